@@ -1,24 +1,86 @@
+import asyncio
 import os
 from typing import Final
 
 from discord import Client, Intents, Message
 from dotenv import load_dotenv
 
+from nlu.async_backend_client import AsyncBackendClient, EventLoopBackendClient
+from nlu.backend_client import BackendClient
 from nlu.chatbot import Chatbot
+from nlu.intent_scheduler import IntentBatchScheduler
+from nlu.worker_pool import ChatbotWorkerPool
 
 load_dotenv()
 TOKEN: Final[str] = os.getenv("DISCORD_TOKEN")
+INTENT_BATCH_SIZE: Final[int] = int(os.getenv("INTENT_BATCH_SIZE", "16"))
+INTENT_BATCH_WINDOW_MS: Final[float] = float(os.getenv("INTENT_BATCH_WINDOW_MS", "8"))
+INTENT_BACKEND: Final[str] = os.getenv("INTENT_BACKEND", "torch")
+INTENT_NUM_THREADS: Final[int] = int(os.getenv("INTENT_NUM_THREADS", "0"))
+INTENT_DETERMINISTIC: Final[bool] = os.getenv("INTENT_DETERMINISTIC", "0") == "1"
+INTENT_TOKENIZER_PATH: Final[str] = os.getenv("INTENT_TOKENIZER_PATH", "vinai/phobert-base")
+INTENT_TOKENIZER_CHECK_PATH: Final[str] = os.getenv("INTENT_TOKENIZER_CHECK_PATH")
+INTENT_MODEL_PATH: Final[str] = os.getenv("INTENT_MODEL_PATH", "output/savedmodels/intents_v2.bin")
+SHADOW_INTENT_BACKEND: Final[str] = os.getenv("SHADOW_INTENT_BACKEND")
+SHADOW_INTENT_MODEL_PATH: Final[str] = os.getenv("SHADOW_INTENT_MODEL_PATH")
+SHADOW_SAMPLE_RATE: Final[float] = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+BACKEND_POOL_SIZE: Final[int] = int(os.getenv("BACKEND_POOL_SIZE", "10"))
+BACKEND_CONNECT_TIMEOUT: Final[float] = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "3.05"))
+BACKEND_READ_TIMEOUT: Final[float] = float(os.getenv("BACKEND_READ_TIMEOUT", "10"))
+BACKEND_MAX_RETRIES: Final[int] = int(os.getenv("BACKEND_MAX_RETRIES", "2"))
+CHATBOT_CONCURRENT_TURNS: Final[int] = int(os.getenv("CHATBOT_CONCURRENT_TURNS", "8"))
+CHATBOT_MAX_SESSIONS: Final[int] = int(os.getenv("CHATBOT_MAX_SESSIONS", "10000"))
+CHATBOT_WORKERS: Final[int] = int(os.getenv("CHATBOT_WORKERS", "0"))
+CHATBOT_WORKER_THREADS: Final[int] = int(os.getenv("CHATBOT_WORKER_THREADS", "1"))
+CHATBOT_WORKER_MAX_SESSIONS: Final[int] = int(os.getenv("CHATBOT_WORKER_MAX_SESSIONS", "10000"))
+
+if SHADOW_INTENT_BACKEND and not SHADOW_INTENT_MODEL_PATH:
+    raise ValueError(
+        f"SHADOW_INTENT_BACKEND is set to '{SHADOW_INTENT_BACKEND}' but SHADOW_INTENT_MODEL_PATH is not set, "
+        "set it to the shadow intent model or unset SHADOW_INTENT_BACKEND"
+    )
 
 intents: Intents = Intents.default()
 intents.message_content = True
 client: Client = Client(intents=intents)
 
+backend_client_config = {
+    "pool_size": BACKEND_POOL_SIZE,
+    "connect_timeout": BACKEND_CONNECT_TIMEOUT,
+    "read_timeout": BACKEND_READ_TIMEOUT,
+    "max_retries": BACKEND_MAX_RETRIES,
+}
+async_backend_client = AsyncBackendClient(**backend_client_config)
+# Worker processes are forked before the event loop starts, so they keep the requests client.
+if CHATBOT_WORKERS:
+    backend_client = BackendClient(**backend_client_config)
+else:
+    backend_client = EventLoopBackendClient(async_backend_client)
 
 chatbot = Chatbot(
     "output/savedmodels/order_entity_v4.h5",
     "output/savedmodels/customer_info_entity_v1.h5",
-    "output/savedmodels/intents_v2.bin",
+    INTENT_MODEL_PATH,
     "src/nlu/responses.json",
+    intent_backend=INTENT_BACKEND,
+    intent_num_threads=INTENT_NUM_THREADS,
+    intent_deterministic=INTENT_DETERMINISTIC,
+    intent_tokenizer_path=INTENT_TOKENIZER_PATH,
+    intent_tokenizer_check_path=INTENT_TOKENIZER_CHECK_PATH,
+    shadow_intent_backend=SHADOW_INTENT_BACKEND,
+    shadow_intent_model_path=SHADOW_INTENT_MODEL_PATH,
+    shadow_sample_rate=SHADOW_SAMPLE_RATE,
+    backend_client=backend_client,
+    max_concurrent_turns=CHATBOT_CONCURRENT_TURNS,
+    max_sessions=CHATBOT_MAX_SESSIONS,
+)
+intent_scheduler = IntentBatchScheduler(
+    chatbot.model_intent.predict_batch, max_batch_size=INTENT_BATCH_SIZE, max_wait_ms=INTENT_BATCH_WINDOW_MS
+)
+worker_pool = (
+    ChatbotWorkerPool(chatbot, CHATBOT_WORKERS, CHATBOT_WORKER_THREADS, CHATBOT_WORKER_MAX_SESSIONS)
+    if CHATBOT_WORKERS
+    else None
 )
 
 
@@ -30,8 +92,15 @@ async def send_message(message: Message, user_message: str) -> None:
     if is_private := user_message[0] == "?":
         user_message = user_message[1:]
 
+    session_key = str(message.channel.id)
     try:
-        response: str = chatbot.handle_message(user_message)
+        if worker_pool:
+            response: str = await asyncio.get_running_loop().run_in_executor(
+                None, worker_pool.handle_message, user_message, session_key
+            )
+        else:
+            await chatbot.prefetch_intent(user_message, intent_scheduler, session_key)
+            response: str = await chatbot.handle_message_async(user_message, session_key)
         (await message.author.send(response) if is_private else await message.channel.send(response))
     except Exception as e:
         print(e)
@@ -39,6 +108,9 @@ async def send_message(message: Message, user_message: str) -> None:
 
 @client.event
 async def on_ready() -> None:
+    intent_scheduler.start()
+    if not CHATBOT_WORKERS:
+        await async_backend_client.start()
     print(f"{client.user} is now running!")
 
 
@@ -0,0 +1,57 @@
+import argparse
+import random
+import re
+import timeit
+
+from models.entities.entities_recognizer import (
+    EntitiesRecognizer,
+    get_word_attributes,
+)
+
+default_sample_texts = [
+    "cho mình 2 bánh pizza hải_sản size l đế dày",
+    "thêm 1 pizza pepperoni cỡ nhỏ đế mỏng với phô_mai",
+    "đổi pizza bbq gà sang size XL, thêm 3 bánh hawaiian",
+    "tên mình là Nam, sđt 0901234567, giao tới 12 Lê Lợi, trả tiền_mặt",
+]
+
+
+def legacy_sentence_features(recognizer: EntitiesRecognizer, words: list) -> list:
+    return [recognizer.word2features(words, i) for i in range(len(words))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sentence_features with per-token word2features")
+    parser.add_argument("--sample-path", default=None, help="text file with one message per line")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.sample_path:
+        with open(args.sample_path, "r", encoding="utf-8") as file:
+            texts = [line.strip() for line in file if line.strip()]
+    else:
+        texts = default_sample_texts
+    sentences = [re.findall(r"[\w']+|[.,!?;]", text) for text in texts]
+    random.shuffle(sentences)
+
+    # word2features and sentence_features do not touch the CRF model, so no model file is needed here.
+    recognizer = EntitiesRecognizer.__new__(EntitiesRecognizer)
+    for words in sentences:
+        expected = legacy_sentence_features(recognizer, words)
+        actual = recognizer.sentence_features(words)
+        if expected != actual or [list(features) for features in expected] != [list(features) for features in actual]:
+            raise ValueError(f"Features differ for {words}")
+
+    legacy_seconds = timeit.timeit(
+        lambda: [legacy_sentence_features(recognizer, words) for words in sentences], number=args.repeat
+    )
+    get_word_attributes.cache_clear()
+    seconds = timeit.timeit(lambda: [recognizer.sentence_features(words) for words in sentences], number=args.repeat)
+    tokens = sum(len(words) for words in sentences) * args.repeat
+    print(f"features identical for {len(sentences)} sentences")
+    print(f"word2features: {legacy_seconds / tokens * 1e6:.2f} us/token")
+    print(f"sentence_features: {seconds / tokens * 1e6:.2f} us/token ({legacy_seconds / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
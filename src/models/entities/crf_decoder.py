@@ -0,0 +1,162 @@
+import argparse
+
+import numpy as np
+
+
+def get_item_attributes(features: dict, prefix: str = ""):
+    # Mirrors how python-crfsuite turns a feature dict into weighted attributes: string values become "key:value" with
+    # weight 1, nested dicts and string lists are flattened with "key:" prefixes and anything else is a numeric weight.
+    for key, value in features.items():
+        key = prefix + key
+        if isinstance(value, str):
+            yield f"{key}:{value}", 1.0
+        elif isinstance(value, dict):
+            yield from get_item_attributes(value, key + ":")
+        elif isinstance(value, (list, set, tuple)):
+            for item in value:
+                yield f"{key}:{item}", 1.0
+        else:
+            yield key, float(value)
+
+
+class CompiledCRF:
+    def __init__(self, labels: list, attribute_ids: dict, state_weights: np.ndarray, transition_weights: np.ndarray):
+        self.labels = labels
+        self.classes_ = labels
+        self.attribute_ids = attribute_ids
+        self.state_weights = state_weights
+        self.transition_weights = transition_weights
+
+    @classmethod
+    def from_model(cls, model):
+        # CRFsuite exports the weights rounded to six decimals, so paths that tie under the rounded weights may decode
+        # differently from the original model. main() checks sample messages before anything is saved.
+        labels = list(model.classes_)
+        label_ids = {label: index for index, label in enumerate(labels)}
+        attribute_ids = {}
+        for attribute, _ in model.state_features_:
+            attribute_ids.setdefault(attribute, len(attribute_ids))
+        state_weights = np.zeros((len(attribute_ids), len(labels)), dtype=np.float64)
+        for (attribute, label), weight in model.state_features_.items():
+            state_weights[attribute_ids[attribute], label_ids[label]] = weight
+        transition_weights = np.zeros((len(labels), len(labels)), dtype=np.float64)
+        for (label_from, label_to), weight in model.transition_features_.items():
+            transition_weights[label_ids[label_from], label_ids[label_to]] = weight
+        return cls(labels, attribute_ids, state_weights, transition_weights)
+
+    @classmethod
+    def load(cls, path: str):
+        data = np.load(path, allow_pickle=False)
+        attributes = data["attributes"].tolist()
+        return cls(
+            data["labels"].tolist(),
+            {attribute: index for index, attribute in enumerate(attributes)},
+            data["state_weights"],
+            data["transition_weights"],
+        )
+
+    def save(self, path: str):
+        attributes = sorted(self.attribute_ids, key=self.attribute_ids.get)
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            attributes=np.array(attributes),
+            state_weights=self.state_weights,
+            transition_weights=self.transition_weights,
+        )
+
+    def get_state_scores(self, sentences: list) -> np.ndarray:
+        # Scores of every token in the batch, one row per token. Attributes unseen in training are skipped, as
+        # CRFsuite does.
+        token_indices = []
+        attribute_indices = []
+        values = []
+        token_index = 0
+        for sentence in sentences:
+            for features in sentence:
+                for attribute, value in get_item_attributes(features):
+                    attribute_id = self.attribute_ids.get(attribute)
+                    if attribute_id is not None and value:
+                        token_indices.append(token_index)
+                        attribute_indices.append(attribute_id)
+                        values.append(value)
+                token_index += 1
+        state_scores = np.zeros((token_index, len(self.labels)), dtype=np.float64)
+        if values:
+            weighted = self.state_weights[attribute_indices] * np.asarray(values)[:, None]
+            np.add.at(state_scores, np.asarray(token_indices), weighted)
+        return state_scores
+
+    def predict(self, sentences: list) -> list:
+        lengths = np.array([len(sentence) for sentence in sentences])
+        if not len(sentences) or not lengths.max():
+            return [[] for _ in sentences]
+        num_labels = len(self.labels)
+        max_length = lengths.max()
+        emissions = np.zeros((len(sentences), max_length, num_labels), dtype=np.float64)
+        mask = np.arange(max_length)[None, :] < lengths[:, None]
+        emissions[mask] = self.get_state_scores(sentences)
+
+        scores = emissions[:, 0].copy()
+        backpointers = np.zeros((len(sentences), max_length, num_labels), dtype=np.int64)
+        for position in range(1, max_length):
+            candidates = scores[:, :, None] + self.transition_weights[None]
+            best_previous = np.argmax(candidates, axis=1)
+            best_scores = np.take_along_axis(candidates, best_previous[:, None, :], axis=1)[:, 0]
+            active = mask[:, position]
+            scores[active] = best_scores[active] + emissions[active, position]
+            backpointers[active, position] = best_previous[active]
+
+        predictions = []
+        for index, length in enumerate(lengths):
+            if not length:
+                predictions.append([])
+                continue
+            label_id = int(np.argmax(scores[index]))
+            path = [label_id]
+            for position in range(length - 1, 0, -1):
+                label_id = int(backpointers[index, position, label_id])
+                path.append(label_id)
+            predictions.append([self.labels[label_id] for label_id in reversed(path)])
+        return predictions
+
+
+def verify_decoder(model, compiled_model: CompiledCRF, sentences: list) -> list:
+    # predict_single keeps the labels as plain lists, CRF.predict packs them into an object array that NumPy cannot
+    # build when an empty sentence comes first.
+    expected = [model.predict_single(sentence) for sentence in sentences]
+    actual = compiled_model.predict(sentences)
+    return [index for index, (labels, compiled_labels) in enumerate(zip(expected, actual)) if labels != compiled_labels]
+
+
+def main():
+    from models.entities.entities_recognizer import EntitiesRecognizer
+
+    parser = argparse.ArgumentParser(description="Compile a CRF entity model into NumPy weight matrices")
+    parser.add_argument("--model-path", default="output/savedmodels/order_entity_v4.h5")
+    parser.add_argument("--output-path", default="output/savedmodels/order_entity_v4.npz")
+    parser.add_argument("--customer", action="store_true", help="the model is the customer information model")
+    parser.add_argument("--sample-path", required=True, help="text file with one message per line")
+    args = parser.parse_args()
+
+    recognizer = EntitiesRecognizer(args.model_path, not args.customer)
+    with open(args.sample_path, "r", encoding="utf-8") as file:
+        texts = [line.strip() for line in file if line.strip()]
+    sentences = [
+        recognizer.sentence_features(recognizer.process_sentence(recognizer.get_entity_text(text))["words"])
+        for text in texts
+    ]
+
+    compiled_model = CompiledCRF.from_model(recognizer.model)
+    mismatches = verify_decoder(recognizer.model, compiled_model, sentences)
+    print(f"samples={len(sentences)}, label_mismatches={len(mismatches)}")
+    if mismatches:
+        for index in mismatches:
+            print(f'"{texts[index]}"')
+        raise ValueError("Compiled decoder does not match the CRF model, nothing saved")
+    compiled_model.save(args.output_path)
+    print(f"Saved {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
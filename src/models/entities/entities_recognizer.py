@@ -1,8 +1,14 @@
 import re
+from functools import lru_cache
 
 from joblib import load
 
-from models.utils.preprocessing import preprocessing
+from models.entities.crf_decoder import CompiledCRF
+from models.utils.preprocessing import (
+    PreprocessedMessage,
+    Preprocessor,
+    default_preprocessor,
+)
 
 order_labels = ["Quantity", "Pizza", "Topping", "Size", "Crust", "O"]
 customer_info_labels = [
@@ -17,13 +23,52 @@ customer_info_labels = [
 ]
 
 
+@lru_cache(maxsize=65536)
+def get_word_attributes(word: str) -> tuple:
+    return word.lower(), word[-3:], word[-2:], word.isupper(), word.isdigit()
+
+
+class EntityResult:
+    def __init__(self, words: list, labels: list, recognizer: "EntitiesRecognizer"):
+        self.words = words
+        self.labels = labels
+        self.recognizer = recognizer
+        self._grouped = None
+        self._indexed = None
+        self._corrections = {}
+
+    def get_grouped(self) -> dict:
+        if self._grouped is None:
+            self._grouped = self.recognizer.reformat_order_result({"words": self.words, "label": self.labels})
+        return {label: list(values) for label, values in self._grouped.items()}
+
+    def get_indexed(self) -> dict:
+        if self._indexed is None:
+            predicted_result = {"words": self.words, "label": self.labels}
+            self._indexed = self.recognizer.reformat_order_result_with_index(predicted_result)
+        return {label: list(values) for label, values in self._indexed.items()}
+
+    def get_corrected(self, label: str, correct):
+        # correct (fuzzy name matching, quantity parsing) runs once on the words of a label, in sentence order, which
+        # is the order of both views, so the grouped and indexed entities share one correction.
+        key = (label, correct)
+        if key not in self._corrections:
+            self._corrections[key] = correct(
+                [word for word, word_label in zip(self.words, self.labels) if word_label == label]
+            )
+        return self._corrections[key]
+
+
 class EntitiesRecognizer:
-    def __init__(self, model_path: str, is_order: bool):
+    def __init__(self, model_path: str, is_order: bool, preprocessor: Preprocessor = default_preprocessor):
         self.model = self._load_model(model_path)
         self.labels = order_labels if is_order else customer_info_labels
         self.is_order = is_order
+        self.preprocessor = preprocessor
 
     def _load_model(self, model_path):
+        if model_path.endswith(".npz"):
+            return CompiledCRF.load(model_path)
         return load(model_path)
 
     def word2features(self, sentence, i):
@@ -63,11 +108,46 @@ class EntitiesRecognizer:
         return features
 
     def sentence_features(self, words):
-        return [self.word2features(words, i) for i in range(len(words))]
+        # Same features, in the same order, as word2features for every position, but each word's attributes are
+        # computed once and shared with its neighbours.
+        attributes = [get_word_attributes(word) for word in words]
+        last_index = len(words) - 1
+        sentence_features = []
+        for i, (lower, suffix3, suffix2, is_upper, is_digit) in enumerate(attributes):
+            features = {
+                "bias": 1.0,
+                "word.lower()": lower,
+                "word[-3:]": suffix3,
+                "word[-2:]": suffix2,
+                "word.isupper()": is_upper,
+                "word.isdigit()": is_digit,
+            }
+            if i > 0:
+                previous_lower, _, _, previous_is_upper, previous_is_digit = attributes[i - 1]
+                features["-1:word.lower()"] = previous_lower
+                features["-1:word.isupper()"] = previous_is_upper
+                features["-1:word.isdigit()"] = previous_is_digit
+            else:
+                features["BOS"] = True
+
+            if i < last_index:
+                next_lower, _, _, next_is_upper, next_is_digit = attributes[i + 1]
+                features["+1:word.lower()"] = next_lower
+                features["+1:word.isupper()"] = next_is_upper
+                features["+1:word.isdigit()"] = next_is_digit
+            else:
+                features["EOS"] = True
+            sentence_features.append(features)
+        return sentence_features
 
     def sentence_labels(self, labels):
         return labels
 
+    def get_entity_text(self, text):
+        if isinstance(text, PreprocessedMessage):
+            return text.entity_text
+        return self.preprocessor.process(text, True)
+
     def process_sentence(self, sentence):
         tokens = re.findall(r"[\w']+|[.,!?;]", sentence)
         return {
@@ -75,35 +155,31 @@ class EntitiesRecognizer:
             "label": ["O"] * len(tokens),
         }
 
+    def predict_labels_batch(self, texts):
+        sentences = [self.process_sentence(self.get_entity_text(text))["words"] for text in texts]
+        if not sentences:
+            return []
+        labels = self.model.predict([self.sentence_features(words) for words in sentences])
+        return [{"words": words, "label": sentence_labels} for words, sentence_labels in zip(sentences, labels)]
+
     def predict(self, text):
-        text = preprocessing(text, True)
-        processed_sentence = self.process_sentence(text)
-        words = processed_sentence["words"]
-        features = self.sentence_features(words)
+        return self.predict_batch([text])[0]
 
-        labels = self.model.predict([features])[0]
+    def predict_result(self, text) -> EntityResult:
+        return self.predict_result_batch([text])[0]
 
-        result = {
-            "words": words,
-            "label": labels,
-        }
-        if self.is_order:
-            return self.reformat_order_result(result)
-        return self.reformat_customer_result(result)
+    def predict_result_batch(self, texts) -> list:
+        return [EntityResult(result["words"], result["label"], self) for result in self.predict_labels_batch(texts)]
 
-    def predict_order_with_index(self, text):
-        text = preprocessing(text, True)
-        processed_sentence = self.process_sentence(text)
-        words = processed_sentence["words"]
-        features = self.sentence_features(words)
+    def predict_batch(self, texts):
+        reformat_result = self.reformat_order_result if self.is_order else self.reformat_customer_result
+        return [reformat_result(result) for result in self.predict_labels_batch(texts)]
 
-        labels = self.model.predict([features])[0]
+    def predict_order_with_index(self, text):
+        return self.predict_order_with_index_batch([text])[0]
 
-        result = {
-            "words": words,
-            "label": labels,
-        }
-        return self.reformat_order_result_with_index(result)
+    def predict_order_with_index_batch(self, texts):
+        return [self.reformat_order_result_with_index(result) for result in self.predict_labels_batch(texts)]
 
     def reformat_order_result_with_index(self, predicted_result):
         output_dict = {}
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import random
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.optim import AdamW
+
+from models.intents.evaluation import (
+    evaluate_intent_model,
+    measure_latency,
+    read_intent_dataset,
+)
+from models.intents.export_onnx import load_intent_model
+from models.intents.intents_recognizer import (
+    IntentsRecognizer,
+    copy_intent_model,
+    encode_intent_texts,
+    intent_labels,
+)
+
+
+def build_student_model(teacher: IntentsRecognizer, num_layers: int) -> IntentsRecognizer:
+    # The student starts as a copy of the teacher with only the bottom encoder layers kept, so embeddings, pooler and
+    # intent head are already trained and distillation only has to adapt them to the shallower encoder.
+    student = copy_intent_model(teacher)
+    student.phobert.encoder.layer = nn.ModuleList(student.phobert.encoder.layer[:num_layers])
+    student.phobert.config.num_hidden_layers = num_layers
+    return student
+
+
+def get_teacher_logits(teacher: IntentsRecognizer, texts: list, batch_size: int) -> torch.Tensor:
+    logits = []
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            encoded_texts = encode_intent_texts(teacher.intent_tokenizer, texts[start : start + batch_size])
+            logits.append(
+                teacher(encoded_texts["input_ids"], encoded_texts["attention_mask"], encoded_texts["token_type_ids"])
+            )
+    return torch.cat(logits)
+
+
+def distillation_loss(student_logits, teacher_logits, targets, temperature: float, alpha: float):
+    soft_loss = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.softmax(teacher_logits / temperature, dim=-1),
+        reduction="batchmean",
+    ) * (temperature**2)
+    hard_loss = F.cross_entropy(student_logits, targets)
+    return alpha * soft_loss + (1 - alpha) * hard_loss
+
+
+def train_student(
+    student: IntentsRecognizer,
+    teacher: IntentsRecognizer,
+    texts: list,
+    labels: list,
+    epochs: int,
+    batch_size: int,
+    learning_rate: float,
+    temperature: float,
+    alpha: float,
+):
+    texts = [student.get_intent_text(text) for text in texts]
+    teacher_logits = get_teacher_logits(teacher, texts, batch_size)
+    targets = torch.tensor([intent_labels.index(label) for label in labels])
+    optimizer = AdamW(student.parameters(), lr=learning_rate)
+    indices = list(range(len(texts)))
+
+    for epoch in range(1, epochs + 1):
+        student.train()
+        random.shuffle(indices)
+        losses = []
+        for start in range(0, len(indices), batch_size):
+            batch_indices = indices[start : start + batch_size]
+            encoded_texts = encode_intent_texts(student.intent_tokenizer, [texts[index] for index in batch_indices])
+            student_logits = student(
+                encoded_texts["input_ids"], encoded_texts["attention_mask"], encoded_texts["token_type_ids"]
+            )
+            loss = distillation_loss(
+                student_logits, teacher_logits[batch_indices], targets[batch_indices], temperature, alpha
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            nn.utils.clip_grad_norm_(student.parameters(), max_norm=1.0)
+            optimizer.step()
+            losses.append(loss.item())
+        print(f"Epoch {epoch}/{epochs}: loss={np.mean(losses):.4f}")
+    return student.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill a truncated-depth PhoBERT student from the intent model")
+    parser.add_argument("--teacher-path", default="output/savedmodels/intents_v2.bin")
+    parser.add_argument("--output-path", default="output/savedmodels/intents_v2_student")
+    parser.add_argument("--train-data-path", default="data/labeled/intent/combined_intents.xlsx")
+    parser.add_argument("--eval-data-path", default="data/labeled/intent/intents_test_human.xlsx")
+    parser.add_argument("--num-layers", type=int, default=6)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=3e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7)
+    parser.add_argument("--latency-samples", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=77)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    torch.manual_seed(args.seed)
+    teacher = load_intent_model(args.teacher_path)
+    student = build_student_model(teacher, args.num_layers)
+    train_texts, train_labels = read_intent_dataset(args.train_data_path)
+    student = train_student(
+        student,
+        teacher,
+        train_texts,
+        train_labels,
+        args.epochs,
+        args.batch_size,
+        args.learning_rate,
+        args.temperature,
+        args.alpha,
+    )
+    student.save_artifact(args.output_path)
+
+    student = IntentsRecognizer.from_artifact(args.output_path).prepare_for_inference()
+    teacher = teacher.prepare_for_inference()
+    texts, labels = read_intent_dataset(args.eval_data_path)
+    teacher_latency = measure_latency(teacher, texts[: args.latency_samples])
+    student_latency = measure_latency(student, texts[: args.latency_samples])
+    report = {
+        "num_layers": args.num_layers,
+        "eval_samples": len(texts),
+        "teacher": {"accuracy": evaluate_intent_model(teacher, texts, labels), **teacher_latency},
+        "student": {"accuracy": evaluate_intent_model(student, texts, labels), **student_latency},
+    }
+    with open(os.path.join(args.output_path, "evaluation_report.json"), "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for name in ["teacher", "student"]:
+        print(
+            f"{name}: accuracy={report[name]['accuracy']:.4f}, latency per message={report[name]['mean_ms']:.1f} ms, "
+            f"p95={report[name]['p95_ms']:.1f} ms"
+        )
+    print(f"Saved {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from models.intents.intents_recognizer import (
+    DEFAULT_PRETRAINED_PATH,
+    IntentsRecognizer,
+    device,
+    quantize_intent_model,
+)
+from models.utils.preprocessing import Preprocessor
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, float("inf")]
+
+intent_engine_loaders = {}
+
+
+def register_intent_engine(name: str):
+    def decorator(loader):
+        intent_engine_loaders[name] = loader
+        return loader
+
+    return decorator
+
+
+def load_intent_engine(
+    name: str,
+    model_path: str,
+    preprocessor: Preprocessor,
+    num_threads: int = 0,
+    tokenizer_path: str = DEFAULT_PRETRAINED_PATH,
+    deterministic: bool = False,
+):
+    # tokenizer_path is used by the exported engines, which keep no tokenizer of their own; a packaged artifact
+    # directory works as well as a hub name. deterministic turns on torch's deterministic algorithms for the whole
+    # process, so it is off unless asked for.
+    if name not in intent_engine_loaders:
+        raise ValueError(f"Unknown intent engine '{name}', expected one of {sorted(intent_engine_loaders)}")
+    return intent_engine_loaders[name](model_path, preprocessor, num_threads, tokenizer_path, deterministic)
+
+
+@register_intent_engine("torch")
+def load_torch_engine(
+    model_path: str, preprocessor: Preprocessor, num_threads: int, tokenizer_path: str, deterministic: bool
+):
+    if os.path.isdir(model_path):
+        model = IntentsRecognizer.from_artifact(model_path, preprocessor)
+    else:
+        model = IntentsRecognizer(preprocessor)
+        model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    return model.to(device).prepare_for_inference(num_threads, deterministic)
+
+
+@register_intent_engine("quantized")
+def load_quantized_engine(
+    model_path: str, preprocessor: Preprocessor, num_threads: int, tokenizer_path: str, deterministic: bool
+):
+    model = quantize_intent_model(IntentsRecognizer(preprocessor))
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    return model.prepare_for_inference(num_threads, deterministic)
+
+
+@register_intent_engine("torchscript")
+def load_torchscript_engine(
+    model_path: str, preprocessor: Preprocessor, num_threads: int, tokenizer_path: str, deterministic: bool
+):
+    from models.intents.torchscript_intents_recognizer import (
+        TorchScriptIntentsRecognizer,
+    )
+
+    return TorchScriptIntentsRecognizer(model_path, preprocessor, num_threads, tokenizer_path)
+
+
+@register_intent_engine("onnx")
+def load_onnx_engine(
+    model_path: str, preprocessor: Preprocessor, num_threads: int, tokenizer_path: str, deterministic: bool
+):
+    from models.intents.onnx_intents_recognizer import OnnxIntentsRecognizer
+
+    return OnnxIntentsRecognizer(model_path, preprocessor, num_threads, tokenizer_path)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total_ms = 0.0
+        self.samples = 0
+
+    def record(self, latency_ms: float):
+        for index, bucket in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bucket:
+                self.counts[index] += 1
+                break
+        self.total_ms += latency_ms
+        self.samples += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets_ms": {str(bucket): count for bucket, count in zip(LATENCY_BUCKETS_MS, self.counts)},
+            "mean_ms": self.total_ms / self.samples if self.samples else 0.0,
+            "samples": self.samples,
+        }
+
+
+class ShadowIntentEngine:
+    def __init__(
+        self,
+        primary,
+        secondary,
+        primary_name: str,
+        secondary_name: str,
+        sample_rate: float = 0.1,
+        max_disagreements: int = 100,
+        log_interval: float = 300,
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.primary_name = primary_name
+        self.secondary_name = secondary_name
+        self.sample_rate = sample_rate
+        self.log_interval = log_interval
+        self.histograms = {primary_name: LatencyHistogram(), secondary_name: LatencyHistogram()}
+        self.agreement = {"compared": 0, "agreed": 0, "skipped": 0}
+        self.disagreements = deque(maxlen=max_disagreements)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-shadow")
+        self._lock = threading.Lock()
+        self._shadow_running = False
+        self._last_log = time.monotonic()
+
+    def __getattr__(self, name):
+        # Anything else Chatbot reads off the intent model (e.g. intent_tokenizer) comes from the primary engine.
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def predict(self, text):
+        label, _ = self.predict_batch([text])[0]
+        return label
+
+    def predict_batch(self, texts):
+        start = time.perf_counter()
+        results = self.primary.predict_batch(texts)
+        with self._lock:
+            self.histograms[self.primary_name].record((time.perf_counter() - start) * 1000)
+        sampled = [(text, label) for text, (label, _) in zip(texts, results) if random.random() < self.sample_rate]
+        if sampled:
+            # At most one shadow run at a time: a secondary slower than the sampled traffic drops samples instead of
+            # queueing an ever longer backlog that competes with the primary for CPU.
+            with self._lock:
+                is_skipped = self._shadow_running
+                if is_skipped:
+                    self.agreement["skipped"] += len(sampled)
+                else:
+                    self._shadow_running = True
+            if not is_skipped:
+                self.executor.submit(self._run_shadow, sampled)
+        return results
+
+    def _run_shadow(self, sampled: list):
+        try:
+            self._compare_shadow(sampled)
+        finally:
+            with self._lock:
+                self._shadow_running = False
+        now = time.monotonic()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.log_stats()
+
+    def _compare_shadow(self, sampled: list):
+        texts = [text for text, _ in sampled]
+        start = time.perf_counter()
+        try:
+            shadow_results = self.secondary.predict_batch(texts)
+        except Exception as e:
+            print(f"Shadow intent engine {self.secondary_name} failed: {e}")
+            return
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.histograms[self.secondary_name].record(latency_ms)
+            for (text, primary_label), (shadow_label, _) in zip(sampled, shadow_results):
+                self.agreement["compared"] += 1
+                if primary_label == shadow_label:
+                    self.agreement["agreed"] += 1
+                else:
+                    self.disagreements.append((getattr(text, "text", text), primary_label, shadow_label))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            compared = self.agreement["compared"]
+            return {
+                "compared": compared,
+                "agreement_rate": self.agreement["agreed"] / compared if compared else None,
+                "skipped": self.agreement["skipped"],
+                "latency": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+                "recent_disagreements": list(self.disagreements),
+            }
+
+    def log_stats(self):
+        stats = self.get_stats()
+        agreement_rate = "n/a" if stats["agreement_rate"] is None else f"{stats['agreement_rate']:.4f}"
+        latency = ", ".join(f"{name} mean={value['mean_ms']:.1f} ms" for name, value in stats["latency"].items())
+        print(
+            f"Shadow intent engine {self.secondary_name}: compared={stats['compared']}, "
+            f"agreement_rate={agreement_rate}, skipped={stats['skipped']}, {latency}"
+        )
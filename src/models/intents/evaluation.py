@@ -0,0 +1,37 @@
+import time
+
+import numpy as np
+
+from models.intents.intents_recognizer import intent_labels
+
+
+def read_intent_dataset(data_path: str):
+    import pandas as pd
+
+    data = pd.read_excel(data_path).fillna(0)
+    texts = [str(text) for text in data["text"]]
+    labels = [intent_labels[index] for index in np.argmax(data[intent_labels].values, axis=1)]
+    return texts, labels
+
+
+def evaluate_intent_model(model, texts: list, labels: list, batch_size: int = 16) -> float:
+    predicted_labels = []
+    for start in range(0, len(texts), batch_size):
+        predicted_labels.extend(label for label, _ in model.predict_batch(texts[start : start + batch_size]))
+    correct = sum(predicted == expected for predicted, expected in zip(predicted_labels, labels))
+    return correct / len(labels) if labels else 0.0
+
+
+def measure_latency(model, texts: list, warmup: int = 3) -> dict:
+    for text in texts[:warmup]:
+        model.predict(text)
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        model.predict(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
@@ -0,0 +1,113 @@
+import argparse
+import os
+
+import numpy as np
+import torch
+
+from models.intents.intents_recognizer import (
+    IntentsRecognizer,
+    encode_intent_texts,
+)
+from models.intents.onnx_intents_recognizer import OnnxIntentsRecognizer
+
+default_sample_texts = [
+    "xem menu",
+    "cho mình xem giỏ hàng",
+    "cho mình 2 bánh pizza hải sản size l đế dày",
+    "thêm 1 pizza pepperoni cỡ nhỏ đế mỏng với phô mai",
+    "xoá pizza hawaiian khỏi giỏ hàng",
+    "đổi pizza bbq gà sang size xl",
+    "mình muốn xác nhận đơn hàng",
+    "đơn hàng của mình tới đâu rồi",
+    "huỷ đơn giúp mình",
+    "tên mình là nam, sđt 0901234567, giao tới 12/3 lê lợi, trả tiền mặt",
+    "y",
+    "n",
+]
+
+
+def read_sample_texts(sample_path: str) -> list:
+    if sample_path.endswith(".xlsx"):
+        import pandas as pd
+
+        return [str(text) for text in pd.read_excel(sample_path).fillna(0)["text"]]
+    with open(sample_path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def load_intent_model(model_path: str) -> IntentsRecognizer:
+    if os.path.isdir(model_path):
+        return IntentsRecognizer.from_artifact(model_path).eval()
+    model = IntentsRecognizer()
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    return model.eval()
+
+
+def export_intent_model(model: IntentsRecognizer, onnx_path: str, opset_version: int = 14):
+    encoded_texts = encode_intent_texts(model.intent_tokenizer, default_sample_texts[:2])
+    torch.onnx.export(
+        model,
+        (encoded_texts["input_ids"], encoded_texts["attention_mask"], encoded_texts["token_type_ids"]),
+        onnx_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=opset_version,
+        do_constant_folding=True,
+    )
+
+
+def verify_parity(model: IntentsRecognizer, onnx_model: OnnxIntentsRecognizer, texts: list, tolerance: float) -> dict:
+    torch_results = model.predict_batch(texts)
+    onnx_results = onnx_model.predict_batch(texts)
+    label_mismatches = [
+        (text, torch_label, onnx_label)
+        for text, (torch_label, _), (onnx_label, _) in zip(texts, torch_results, onnx_results)
+        if torch_label != onnx_label
+    ]
+    max_probability_diff = max(
+        float(np.max(np.abs(torch_probabilities - onnx_probabilities)))
+        for (_, torch_probabilities), (_, onnx_probabilities) in zip(torch_results, onnx_results)
+    )
+    return {
+        "samples": len(texts),
+        "label_mismatches": label_mismatches,
+        "max_probability_diff": max_probability_diff,
+        "passed": not label_mismatches and max_probability_diff <= tolerance,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the PhoBERT intent classifier to ONNX")
+    parser.add_argument("--model-path", default="output/savedmodels/intents_v2.bin")
+    parser.add_argument("--onnx-path", default="output/savedmodels/intents_v2.onnx")
+    parser.add_argument("--sample-path", default=None, help="xlsx with a 'text' column or a text file, one per line")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--opset-version", type=int, default=14)
+    args = parser.parse_args()
+
+    model = load_intent_model(args.model_path)
+    export_intent_model(model, args.onnx_path, args.opset_version)
+
+    sample_texts = read_sample_texts(args.sample_path) if args.sample_path else default_sample_texts
+    onnx_model = OnnxIntentsRecognizer(args.onnx_path, tokenizer_path=model.intent_tokenizer.pretrained_path)
+    report = verify_parity(model, onnx_model, sample_texts, args.tolerance)
+    print(
+        f"samples={report['samples']}, label_mismatches={len(report['label_mismatches'])}, "
+        f"max_probability_diff={report['max_probability_diff']:.2e}"
+    )
+    if not report["passed"]:
+        os.remove(args.onnx_path)
+        for text, torch_label, onnx_label in report["label_mismatches"]:
+            print(f'"{text}": torch={torch_label}, onnx={onnx_label}')
+        raise ValueError("ONNX model does not match the PyTorch model, export discarded")
+    print(f"Exported {args.onnx_path}")
+
+
+if __name__ == "__main__":
+    main()
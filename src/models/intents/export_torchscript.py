@@ -0,0 +1,56 @@
+import argparse
+import os
+
+import torch
+
+from models.intents.export_onnx import (
+    default_sample_texts,
+    load_intent_model,
+    read_sample_texts,
+    verify_parity,
+)
+from models.intents.intents_recognizer import encode_intent_texts
+from models.intents.torchscript_intents_recognizer import (
+    TorchScriptIntentsRecognizer,
+)
+
+
+def export_intent_model(model, torchscript_path: str):
+    encoded_texts = encode_intent_texts(model.intent_tokenizer, default_sample_texts[:2])
+    with torch.no_grad():
+        traced_model = torch.jit.trace(
+            model,
+            (encoded_texts["input_ids"], encoded_texts["attention_mask"], encoded_texts["token_type_ids"]),
+            strict=False,
+        )
+    traced_model.save(torchscript_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the PhoBERT intent classifier to TorchScript")
+    parser.add_argument("--model-path", default="output/savedmodels/intents_v2.bin")
+    parser.add_argument("--torchscript-path", default="output/savedmodels/intents_v2.pt")
+    parser.add_argument("--sample-path", default=None, help="xlsx with a 'text' column or a text file, one per line")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    model = load_intent_model(args.model_path)
+    export_intent_model(model, args.torchscript_path)
+
+    sample_texts = read_sample_texts(args.sample_path) if args.sample_path else default_sample_texts
+    torchscript_model = TorchScriptIntentsRecognizer(
+        args.torchscript_path, tokenizer_path=model.intent_tokenizer.pretrained_path
+    )
+    report = verify_parity(model, torchscript_model, sample_texts, args.tolerance)
+    print(
+        f"samples={report['samples']}, label_mismatches={len(report['label_mismatches'])}, "
+        f"max_probability_diff={report['max_probability_diff']:.2e}"
+    )
+    if not report["passed"]:
+        os.remove(args.torchscript_path)
+        raise ValueError("TorchScript model does not match the PyTorch model, export discarded")
+    print(f"Exported {args.torchscript_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,121 @@
+import copy
+import os
+
 import numpy as np
 import torch
 import torch.nn as nn
-from transformers import AutoModel, AutoTokenizer
+from transformers import AutoModel
 
-from models.utils.preprocessing import preprocessing
+from models.intents.tokenization import IntentTokenizer
+from models.utils.preprocessing import (
+    PreprocessedMessage,
+    Preprocessor,
+    default_preprocessor,
+)
 
 THRESHOLD = 0.996
 MAX_LEN = 128
+DEFAULT_PRETRAINED_PATH = "vinai/phobert-base"
+INTENT_HEAD_FILE = "intent_head.bin"
 device = torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
+intent_labels = [
+    "view_menu",
+    "view_cart",
+    "add_to_cart",
+    "remove_from_cart",
+    "modify_cart_item",
+    "confirm_order",
+    "track_order",
+    "cancel_order",
+    "provide_info",
+]
+
+
+def encode_intent_texts(tokenizer, texts: list, return_tensors: str = "pt"):
+    return tokenizer(
+        texts,
+        max_length=MAX_LEN,
+        add_special_tokens=True,
+        return_token_type_ids=True,
+        padding="longest",
+        truncation=True,
+        return_attention_mask=True,
+        return_tensors=return_tensors,
+    )
+
+
+def copy_intent_model(model: nn.Module) -> nn.Module:
+    # A deep copy of the whole recognizer would include its preprocessor and tokenizer, which hold locks and cannot be
+    # copied. Only the layers are copied, the copy shares everything else with the original.
+    model_copy = copy.copy(model)
+    model_copy._modules = copy.deepcopy(model._modules)
+    model_copy._parameters = copy.deepcopy(model._parameters)
+    model_copy._buffers = copy.deepcopy(model._buffers)
+    return model_copy
+
+
+def quantize_intent_model(model: nn.Module) -> nn.Module:
+    # quantize_dynamic deep-copies the model unless asked to work in place.
+    return torch.quantization.quantize_dynamic(copy_intent_model(model), {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def get_intent_label(probabilities):
+    max_prob = np.max(probabilities)
+    max_prob_index = np.argmax(probabilities)
 
+    if max_prob >= THRESHOLD:
+        return intent_labels[max_prob_index]
+    else:
+        return None
 
-class IntentsRecognizer(nn.Module):
-    def __init__(self):
+
+class IntentPredictorMixin:
+    # Shared by the PyTorch, TorchScript and ONNX recognizers, which only differ in predict_batch.
+    def get_intent_text(self, text):
+        if isinstance(text, PreprocessedMessage):
+            return text.intent_text
+        return self.preprocessor.process(text, False)
+
+    def predict(self, text):
+        label, _ = self.predict_batch([text])[0]
+        return label
+
+
+class IntentsRecognizer(IntentPredictorMixin, nn.Module):
+    def __init__(
+        self, preprocessor: Preprocessor = default_preprocessor, pretrained_path: str = DEFAULT_PRETRAINED_PATH
+    ):
         super(IntentsRecognizer, self).__init__()
-        self.phobert = AutoModel.from_pretrained("vinai/phobert-base")
+        self.phobert = AutoModel.from_pretrained(pretrained_path)
         self.dropout = nn.Dropout(p=0.3)
         self.linear = nn.Linear(768, 9)
-        self.intent_labels = [
-            "view_menu",
-            "view_cart",
-            "add_to_cart",
-            "remove_from_cart",
-            "modify_cart_item",
-            "confirm_order",
-            "track_order",
-            "cancel_order",
-            "provide_info",
-        ]
-        self.intent_tokenizer = AutoTokenizer.from_pretrained("vinai/phobert-base", use_fast=False)
+        self.intent_labels = intent_labels
+        self.intent_tokenizer = IntentTokenizer(pretrained_path)
+        self.preprocessor = preprocessor
+
+    @classmethod
+    def from_artifact(cls, artifact_path: str, preprocessor: Preprocessor = default_preprocessor):
+        model = cls(preprocessor, artifact_path)
+        head_state_dict = torch.load(os.path.join(artifact_path, INTENT_HEAD_FILE), map_location="cpu")
+        model.linear.load_state_dict(head_state_dict)
+        return model
+
+    def save_artifact(self, artifact_path: str):
+        os.makedirs(artifact_path, exist_ok=True)
+        self.phobert.save_pretrained(artifact_path, safe_serialization=True)
+        self.intent_tokenizer.save_pretrained(artifact_path)
+        torch.save(self.linear.state_dict(), os.path.join(artifact_path, INTENT_HEAD_FILE))
+
+    def prepare_for_inference(self, num_threads: int = 0, deterministic: bool = False):
+        # Thread count and deterministic algorithms are torch-wide settings, they apply to every model in the process.
+        self.eval()
+        for parameter in self.parameters():
+            parameter.requires_grad_(False)
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        if deterministic:
+            torch.use_deterministic_algorithms(True, warn_only=True)
+        return self
 
     def forward(self, input_ids, attn_mask, token_type_ids):
         output = self.phobert(input_ids, attention_mask=attn_mask, token_type_ids=token_type_ids)
@@ -35,27 +123,16 @@ class IntentsRecognizer(nn.Module):
         output = self.linear(output_dropout)
         return output
 
-    def predict(self, text):
-        text = preprocessing(text, False)
-        encoded_text = self.intent_tokenizer.encode_plus(
-            text,
-            max_length=MAX_LEN,
-            add_special_tokens=True,
-            return_token_type_ids=True,
-            pad_to_max_length=True,
-            return_attention_mask=True,
-            return_tensors="pt",
-        )
-        input_ids = encoded_text["input_ids"].to(device)
-        attention_mask = encoded_text["attention_mask"].to(device)
-        token_type_ids = encoded_text["token_type_ids"].to(device)
-        output = self(input_ids, attention_mask, token_type_ids)
-        probabilities = torch.softmax(output, dim=-1).detach().cpu().numpy().flatten()
-
-        max_prob = np.max(probabilities)
-        max_prob_index = np.argmax(probabilities)
-
-        if max_prob >= THRESHOLD:
-            return self.intent_labels[max_prob_index]
-        else:
-            return None
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        texts = [self.get_intent_text(text) for text in texts]
+        encoded_texts = encode_intent_texts(self.intent_tokenizer, texts)
+        model_device = next(self.parameters()).device
+        input_ids = encoded_texts["input_ids"].to(model_device)
+        attention_mask = encoded_texts["attention_mask"].to(model_device)
+        token_type_ids = encoded_texts["token_type_ids"].to(model_device)
+        with torch.inference_mode():
+            output = self(input_ids, attention_mask, token_type_ids)
+            probabilities = torch.softmax(output, dim=-1).cpu().numpy()
+        return [(get_intent_label(item_probabilities), item_probabilities) for item_probabilities in probabilities]
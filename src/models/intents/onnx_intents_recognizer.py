@@ -0,0 +1,51 @@
+import numpy as np
+
+from models.intents.intents_recognizer import (
+    DEFAULT_PRETRAINED_PATH,
+    IntentPredictorMixin,
+    encode_intent_texts,
+    get_intent_label,
+    intent_labels,
+)
+from models.intents.tokenization import IntentTokenizer
+from models.utils.preprocessing import Preprocessor, default_preprocessor
+
+
+class OnnxIntentsRecognizer(IntentPredictorMixin):
+    def __init__(
+        self,
+        model_path: str,
+        preprocessor: Preprocessor = default_preprocessor,
+        num_threads: int = 0,
+        tokenizer_path: str = DEFAULT_PRETRAINED_PATH,
+    ):
+        self.session = self._load_session(model_path, num_threads)
+        self.intent_labels = intent_labels
+        self.intent_tokenizer = IntentTokenizer(tokenizer_path)
+        self.preprocessor = preprocessor
+
+    def _load_session(self, model_path: str, num_threads: int):
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+        return onnxruntime.InferenceSession(model_path, session_options, providers=["CPUExecutionProvider"])
+
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        texts = [self.get_intent_text(text) for text in texts]
+        encoded_texts = encode_intent_texts(self.intent_tokenizer, texts, return_tensors="np")
+        (logits,) = self.session.run(
+            ["logits"],
+            {
+                "input_ids": encoded_texts["input_ids"].astype(np.int64),
+                "attention_mask": encoded_texts["attention_mask"].astype(np.int64),
+                "token_type_ids": encoded_texts["token_type_ids"].astype(np.int64),
+            },
+        )
+        exp_logits = np.exp(logits - np.max(logits, axis=-1, keepdims=True))
+        probabilities = exp_logits / np.sum(exp_logits, axis=-1, keepdims=True)
+        return [(get_intent_label(item_probabilities), item_probabilities) for item_probabilities in probabilities]
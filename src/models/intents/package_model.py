@@ -0,0 +1,36 @@
+import argparse
+
+import numpy as np
+import torch
+
+from models.intents.export_onnx import default_sample_texts
+from models.intents.intents_recognizer import IntentsRecognizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Package the intent model into a self-contained artifact directory")
+    parser.add_argument("--model-path", default="output/savedmodels/intents_v2.bin")
+    parser.add_argument("--artifact-path", default="output/savedmodels/intents_v2")
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    model = IntentsRecognizer()
+    model.load_state_dict(torch.load(args.model_path, map_location="cpu"))
+    model.eval()
+    model.save_artifact(args.artifact_path)
+
+    packaged_model = IntentsRecognizer.from_artifact(args.artifact_path).eval()
+    max_probability_diff = max(
+        float(np.max(np.abs(probabilities - packaged_probabilities)))
+        for (_, probabilities), (_, packaged_probabilities) in zip(
+            model.predict_batch(default_sample_texts), packaged_model.predict_batch(default_sample_texts)
+        )
+    )
+    print(f"max_probability_diff={max_probability_diff:.2e}")
+    if max_probability_diff > args.tolerance:
+        raise ValueError("Packaged model does not reproduce the original predictions")
+    print(f"Packaged {args.artifact_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+
+import torch
+
+from models.intents.evaluation import (
+    evaluate_intent_model,
+    measure_latency,
+    read_intent_dataset,
+)
+from models.intents.intents_recognizer import (
+    IntentsRecognizer,
+    quantize_intent_model,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an int8 dynamically quantized intent model")
+    parser.add_argument("--model-path", default="output/savedmodels/intents_v2.bin")
+    parser.add_argument("--output-path", default="output/savedmodels/intents_v2_int8.bin")
+    parser.add_argument("--eval-data-path", default="data/labeled/intent/intents_test_human.xlsx")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument("--latency-samples", type=int, default=50)
+    args = parser.parse_args()
+
+    model = IntentsRecognizer()
+    model.load_state_dict(torch.load(args.model_path, map_location="cpu"))
+    model.eval()
+    quantized_model = quantize_intent_model(model).eval()
+
+    texts, labels = read_intent_dataset(args.eval_data_path)
+    accuracy = evaluate_intent_model(model, texts, labels)
+    quantized_accuracy = evaluate_intent_model(quantized_model, texts, labels)
+    latency = measure_latency(model, texts[: args.latency_samples])
+    quantized_latency = measure_latency(quantized_model, texts[: args.latency_samples])
+
+    print(f"accuracy: fp32={accuracy:.4f}, int8={quantized_accuracy:.4f}")
+    print(f"latency per message: fp32={latency['mean_ms']:.1f} ms, int8={quantized_latency['mean_ms']:.1f} ms")
+    print(f"p95 latency: fp32={latency['p95_ms']:.1f} ms, int8={quantized_latency['p95_ms']:.1f} ms")
+    if accuracy - quantized_accuracy > args.max_accuracy_drop:
+        raise ValueError(
+            f"Accuracy dropped by {accuracy - quantized_accuracy:.4f}, "
+            f"more than the allowed {args.max_accuracy_drop:.4f}; quantized model not saved"
+        )
+
+    torch.save(quantized_model.state_dict(), args.output_path)
+    size = os.path.getsize(args.model_path) / 1024 / 1024
+    quantized_size = os.path.getsize(args.output_path) / 1024 / 1024
+    print(f"size: fp32={size:.1f} MB, int8={quantized_size:.1f} MB")
+    print(f"Saved {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
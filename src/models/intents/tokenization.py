@@ -0,0 +1,96 @@
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+
+WORD_PATTERN = re.compile(r"\S+\n?")
+
+
+class BoundedCache(OrderedDict):
+    def __init__(self, max_size: int = 50000):
+        super().__init__()
+        self.max_size = max_size
+        self._lock = threading.RLock()
+
+    def __reduce__(self):
+        # Copies and pickles are rebuilt through __init__, which gives them a lock of their own.
+        return self.__class__, (self.max_size,), None, None, iter(list(self.items()))
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            if len(self) > self.max_size:
+                self.popitem(last=False)
+
+
+class IntentTokenizer:
+    def __init__(self, pretrained_path: str = "vinai/phobert-base", cache_size: int = 50000):
+        self.pretrained_path = pretrained_path
+        self.slow_tokenizer = AutoTokenizer.from_pretrained(pretrained_path, use_fast=False)
+        self.slow_tokenizer.cache = BoundedCache(cache_size)
+        self.fast_tokenizer = None
+        self.word_ids = BoundedCache(cache_size)
+        self.special_tokens = [token for token in self.slow_tokenizer.all_special_tokens if token]
+
+    def enable_fast_tokenizer(self, verification_texts: list) -> bool:
+        try:
+            fast_tokenizer = AutoTokenizer.from_pretrained(self.pretrained_path, use_fast=True)
+        except Exception:
+            return False
+        if not fast_tokenizer.is_fast or not verification_texts:
+            return False
+        for text in verification_texts:
+            if fast_tokenizer.encode(text) != self.slow_tokenizer.encode(text):
+                return False
+        self.fast_tokenizer = fast_tokenizer
+        return True
+
+    def get_word_ids(self, word: str) -> list:
+        try:
+            return self.word_ids[word]
+        except KeyError:
+            tokens = self.slow_tokenizer._tokenize(word)
+            ids = self.slow_tokenizer.convert_tokens_to_ids(tokens)
+            self.word_ids[word] = ids
+            return ids
+
+    def encode(self, text: str, max_length: int) -> list:
+        if any(special_token in text for special_token in self.special_tokens):
+            ids = self.slow_tokenizer.encode(text, add_special_tokens=False)
+        else:
+            ids = [word_id for word in WORD_PATTERN.findall(text) for word_id in self.get_word_ids(word)]
+        ids = ids[: max_length - 2]
+        return [self.slow_tokenizer.bos_token_id] + ids + [self.slow_tokenizer.eos_token_id]
+
+    def __call__(self, texts: list, max_length: int, return_tensors: str = "pt", **kwargs):
+        if self.fast_tokenizer is not None:
+            return self.fast_tokenizer(texts, max_length=max_length, return_tensors=return_tensors, **kwargs)
+
+        encoded_texts = [self.encode(text, max_length) for text in texts]
+        sequence_length = max(len(ids) for ids in encoded_texts)
+        input_ids = np.full((len(texts), sequence_length), self.slow_tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(texts), sequence_length), dtype=np.int64)
+        for index, ids in enumerate(encoded_texts):
+            input_ids[index, : len(ids)] = ids
+            attention_mask[index, : len(ids)] = 1
+        encoded = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
+        }
+        if return_tensors == "pt":
+            return {key: torch.from_numpy(value) for key, value in encoded.items()}
+        return encoded
+
+    def save_pretrained(self, save_directory: str):
+        return self.slow_tokenizer.save_pretrained(save_directory)
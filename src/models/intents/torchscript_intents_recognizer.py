@@ -0,0 +1,39 @@
+import torch
+
+from models.intents.intents_recognizer import (
+    DEFAULT_PRETRAINED_PATH,
+    IntentPredictorMixin,
+    encode_intent_texts,
+    get_intent_label,
+    intent_labels,
+)
+from models.intents.tokenization import IntentTokenizer
+from models.utils.preprocessing import Preprocessor, default_preprocessor
+
+
+class TorchScriptIntentsRecognizer(IntentPredictorMixin):
+    def __init__(
+        self,
+        model_path: str,
+        preprocessor: Preprocessor = default_preprocessor,
+        num_threads: int = 0,
+        tokenizer_path: str = DEFAULT_PRETRAINED_PATH,
+    ):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model = torch.jit.freeze(torch.jit.load(model_path, map_location="cpu").eval())
+        self.intent_labels = intent_labels
+        self.intent_tokenizer = IntentTokenizer(tokenizer_path)
+        self.preprocessor = preprocessor
+
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        texts = [self.get_intent_text(text) for text in texts]
+        encoded_texts = encode_intent_texts(self.intent_tokenizer, texts)
+        with torch.inference_mode():
+            output = self.model(
+                encoded_texts["input_ids"], encoded_texts["attention_mask"], encoded_texts["token_type_ids"]
+            )
+            probabilities = torch.softmax(output, dim=-1).numpy()
+        return [(get_intent_label(item_probabilities), item_probabilities) for item_probabilities in probabilities]
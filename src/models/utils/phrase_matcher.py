@@ -0,0 +1,306 @@
+import re
+
+WORD_RUN_PATTERN = re.compile(r"\w+|\W+")
+REGULAR_STOPWORD_PATTERN = re.compile(r"\w+(?: \w+)*")
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def is_word_boundary(text: str, position: int) -> bool:
+    # Same test as the regex \b at position.
+    before = position > 0 and is_word_char(text[position - 1])
+    after = position < len(text) and is_word_char(text[position])
+    return before != after
+
+
+class AhoCorasickAutomaton:
+    def __init__(self, patterns: list):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        self.dict_link = [0]
+        for index, pattern in enumerate(patterns):
+            self._add_pattern(pattern, index)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, index: int):
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.dict_link.append(0)
+                self.goto[node][char] = next_node
+            node = next_node
+        # Patterns can repeat, e.g. when two dictionary keys only differ in case.
+        self.output[node] += (index,)
+
+    def _build_failure_links(self):
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fail_state = self.goto[state].get(char, 0)
+                self.fail[child] = fail_state
+                self.dict_link[child] = fail_state if self.output[fail_state] else self.dict_link[fail_state]
+                queue.append(child)
+
+    def iter_matches(self, text: str):
+        # Yields (end, pattern_index) for every occurrence of every pattern, end being exclusive.
+        goto, fail, output, dict_link = self.goto, self.fail, self.output, self.dict_link
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if output[node] else dict_link[node]
+            while match:
+                for index in output[match]:
+                    yield position + 1, index
+                match = dict_link[match]
+
+    def find_pattern_indices(self, text: str) -> set:
+        return {index for _, index in self.iter_matches(text)}
+
+
+class PhraseReplacer:
+    def __init__(self, replacement_dictionary: dict):
+        self.items = sorted(replacement_dictionary.items(), key=lambda x: len(x[0]), reverse=True)
+        self.automaton = AhoCorasickAutomaton([original.lower() for original, _ in self.items])
+        self.has_joined_tokens = any("_" in token for _, token in self.items)
+        self.compiled_patterns = {}
+        # The single pass in replace() takes every occurrence from the original text, which only gives the sequential
+        # result when a replacement cannot change what the later phrases see around it: it has to keep the word/non-word
+        # kind of its edge characters, so word boundaries do not move, and no later phrase may match across its edges.
+        # Texts containing any other phrase go through the sequential path.
+        self.unsafe_indices = {
+            index
+            for index, (original, token) in enumerate(self.items)
+            if not token
+            or len(token.lower()) != len(token)
+            or is_word_char(original[0]) != is_word_char(token[0])
+            or is_word_char(original[-1]) != is_word_char(token[-1])
+        }
+        phrase_chars = {char for original, _ in self.items for char in original.lower()}
+        self.word_padding = next(
+            char for char in map(chr, range(0x4E00, 0xA000)) if is_word_char(char) and char not in phrase_chars
+        )
+        self.non_word_padding = next(
+            char for char in map(chr, range(0x2E80, 0x2F00)) if not is_word_char(char) and char not in phrase_chars
+        )
+        self.resolved_tokens = []
+        token_states = []
+        for index, (_, token) in enumerate(self.items):
+            states = [token] if index in self.unsafe_indices else self._resolve_token(index)
+            self.resolved_tokens.append(states[-1])
+            token_states.append(states)
+        self.unsafe_indices.update(self._find_straddled_indices(token_states))
+
+    def _resolve_token(self, index: int) -> list:
+        # A replacement is itself rewritten by the shorter phrases applied after it. It is resolved between two
+        # characters that belong to no phrase, chosen so that its edges are word boundaries as in the text it is spliced
+        # into. Returns every intermediate form of the token, the resolved one last.
+        token = self.items[index][1]
+        left_padding = self.non_word_padding if is_word_char(token[0]) else self.word_padding
+        right_padding = self.non_word_padding if is_word_char(token[-1]) else self.word_padding
+        states = []
+        self.replace_sequentially(left_padding + token + right_padding, index + 1, states)
+        states = [token] + [state[1:-1] for state in states]
+        resolved_token = states[-1]
+        if (
+            not resolved_token
+            or len(resolved_token.lower()) != len(resolved_token)
+            or is_word_char(resolved_token[0]) != is_word_char(token[0])
+            or is_word_char(resolved_token[-1]) != is_word_char(token[-1])
+        ):
+            self.unsafe_indices.add(index)
+        return states
+
+    def _find_straddled_indices(self, token_states: list) -> set:
+        # A spliced token always sits on word boundaries, so a phrase can only run across one of its edges where the
+        # phrase itself switches between word and non-word characters, and must end or start on a boundary inside it.
+        def is_split(text: str, position: int) -> bool:
+            return is_word_char(text[position - 1]) != is_word_char(text[position])
+
+        heads = {}
+        tails = {}
+        wholes = {}
+        for index, states in enumerate(token_states):
+            for state in states:
+                state = state.lower()
+                wholes.setdefault(state, []).append(index)
+                for length in range(1, len(state) + 1):
+                    if length == len(state) or is_split(state, length):
+                        heads.setdefault(state[:length], []).append(index)
+                    if length == len(state) or is_split(state, len(state) - length):
+                        tails.setdefault(state[-length:], []).append(index)
+
+        straddled_indices = set()
+        for phrase_index, (original, _) in enumerate(self.items):
+            original = original.lower()
+            for split in range(1, len(original)):
+                if not is_split(original, split):
+                    continue
+                indices = heads.get(original[split:], []) + tails.get(original[:split], [])
+                for other_split in range(split + 1, len(original)):
+                    if is_split(original, other_split):
+                        indices += wholes.get(original[split:other_split], [])
+                straddled_indices.update(index for index in indices if index < phrase_index)
+        return straddled_indices
+
+    def _get_pattern(self, index: int) -> re.Pattern:
+        pattern = self.compiled_patterns.get(index)
+        if pattern is None:
+            original = self.items[index][0]
+            pattern = re.compile(r"\b" + re.escape(original) + r"\b", re.IGNORECASE)
+            self.compiled_patterns[index] = pattern
+        return pattern
+
+    def replace_sequentially(self, text: str, first_index: int = 0, states: list = None) -> str:
+        # Reference behaviour: one word-boundary substitution per phrase, longest phrases first. The automaton only
+        # narrows down which phrases to try; a substitution can expose new phrases, hence the rescan.
+        candidates = sorted(i for i in self.automaton.find_pattern_indices(text.lower()) if i >= first_index)
+        position = 0
+        while position < len(candidates):
+            index = candidates[position]
+            new_text = self._get_pattern(index).sub(self.items[index][1], text)
+            position += 1
+            if new_text != text:
+                text = new_text
+                if states is not None:
+                    states.append(text)
+                candidates = sorted(i for i in self.automaton.find_pattern_indices(text.lower()) if i > index)
+                position = 0
+        return text
+
+    def replace(self, text: str) -> str:
+        # One automaton pass collects every word-bounded occurrence. Occurrences are taken in the order the sequential
+        # substitutions would apply them (longest phrase first, then left to right) and dropped when they overlap one
+        # already taken, which is what the earlier substitution would have done to them.
+        lowered_text = text.lower()
+        if len(lowered_text) != len(text):
+            return self.replace_sequentially(text)
+
+        occurrences = []
+        for end, index in self.automaton.iter_matches(lowered_text):
+            start = end - len(self.items[index][0])
+            if is_word_boundary(text, start) and is_word_boundary(text, end):
+                occurrences.append((index, start, end))
+        if not occurrences:
+            return text
+
+        occurrences.sort()
+        taken = bytearray(len(text))
+        selected = []
+        for index, start, end in occurrences:
+            if any(taken[start:end]):
+                continue
+            if index in self.unsafe_indices:
+                return self.replace_sequentially(text)
+            taken[start:end] = b"\x01" * (end - start)
+            selected.append((start, end, index))
+
+        selected.sort()
+        pieces = []
+        kept_from = 0
+        for start, end, index in selected:
+            pieces.append(text[kept_from:start])
+            pieces.append(self.resolved_tokens[index])
+            kept_from = end
+        pieces.append(text[kept_from:])
+        return "".join(pieces)
+
+
+class StopwordRemover:
+    def __init__(self, stopwords_dictionary: set):
+        self.single_stopwords = set()
+        self.stopword_trie = {}
+        self.irregular_stopwords = []
+        self.has_empty_stopword = "" in stopwords_dictionary
+        for stopword in stopwords_dictionary:
+            if not stopword:
+                continue
+            if not REGULAR_STOPWORD_PATTERN.fullmatch(stopword):
+                self.irregular_stopwords.append(stopword)
+                continue
+            words = stopword.split(" ")
+            if len(words) == 1:
+                self.single_stopwords.add(stopword)
+            node = self.stopword_trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[None] = True
+        self.irregular_stopwords.sort(key=len, reverse=True)
+
+    def _match_regular(self, runs: list, run_index: int) -> int:
+        # Returns the index of the last word run of the longest stopword starting at run_index, or -1.
+        text = runs[run_index][0]
+        if text not in self.stopword_trie:
+            return -1
+        best = run_index if text in self.single_stopwords else -1
+        node = self.stopword_trie[text]
+        index = run_index
+        while index + 2 < len(runs) and runs[index + 1][0] == " ":
+            node = node.get(runs[index + 2][0])
+            if node is None:
+                break
+            index += 2
+            if None in node:
+                best = index
+        return best
+
+    def _match_irregular(self, text: str, position: int) -> int:
+        for stopword in self.irregular_stopwords:
+            end = position + len(stopword)
+            if text.startswith(stopword, position) and (end == len(text) or not is_word_char(text[end])):
+                return end
+        return -1
+
+    def remove(self, text: str) -> str:
+        # Same matches as re.sub(r"\b(?:<stopwords, longest first>)(?:\W|$)", " ", text): a stopword must start on a
+        # word boundary, be followed by a non-word character or the end of the text, and that character is removed
+        # together with it.
+        runs = [
+            (match.group(), match.start(), match.end(), is_word_char(match.group()[0]))
+            for match in WORD_RUN_PATTERN.finditer(text)
+        ]
+        pieces = []
+        kept_from = 0
+        run_index = 0
+        while run_index < len(runs):
+            _, start, _, is_word = runs[run_index]
+            at_boundary = is_word or run_index > 0
+            if not at_boundary or start < kept_from:
+                run_index += 1
+                continue
+
+            match_end = -1
+            if is_word:
+                last_run = self._match_regular(runs, run_index)
+                if last_run != -1:
+                    match_end = runs[last_run][2]
+            if self.irregular_stopwords:
+                match_end = max(match_end, self._match_irregular(text, start))
+            if match_end == -1 and not is_word and self.has_empty_stopword:
+                match_end = start
+
+            if match_end == -1:
+                run_index += 1
+                continue
+
+            pieces.append(text[kept_from:start])
+            pieces.append(" ")
+            kept_from = min(match_end + 1, len(text))
+            run_index += 1
+        pieces.append(text[kept_from:])
+        return "".join(pieces)
@@ -1,7 +1,13 @@
 import json
 import re
+import threading
 import unicodedata
 
+from models.utils.phrase_matcher import PhraseReplacer, StopwordRemover
+
+KIET_SLASH_PATTERN = re.compile(r"(?<=\d)/(?=\d)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
 
 def read_tokenize_dictionary(dictionary_path="src/models/utils/tokenize_dictionary.json"):
     with open(dictionary_path, "r", encoding="utf-8") as file:
@@ -25,34 +31,59 @@ def lowercase_text(text: str):
     return text.lower()
 
 
+class DiacriticFoldingTable(dict):
+    def __init__(self, prefilled_ranges: list):
+        super().__init__()
+        for start, end in prefilled_ranges:
+            for code_point in range(start, end):
+                self[code_point]
+
+    def __missing__(self, code_point: int) -> str:
+        nfkd_form = unicodedata.normalize("NFKD", chr(code_point))
+        folded = "".join([c for c in nfkd_form if not unicodedata.combining(c)]).replace("đ", "d")
+        self[code_point] = folded
+        return folded
+
+
+diacritic_folding_table = DiacriticFoldingTable([(0x0000, 0x0250), (0x0300, 0x0370), (0x1E00, 0x1F00)])
+
+
 def remove_diacritic(text: str):
-    nfkd_form = unicodedata.normalize("NFKD", text)
-    return "".join([c for c in nfkd_form if not unicodedata.combining(c)]).replace("đ", "d")
+    return text.translate(diacritic_folding_table)
+
+
+def get_phrase_replacer(replacement_dictionary: dict) -> PhraseReplacer:
+    # Building a replacer is costly, callers running many texts pass the one held by their Preprocessor.
+    if isinstance(replacement_dictionary, PhraseReplacer):
+        return replacement_dictionary
+    return PhraseReplacer(replacement_dictionary)
 
 
 def replace_tokens(text: str, replacement_dictionary: dict):
-    pattern = r"(?<=\d)/(?=\d)"
-    text = re.sub(pattern, " kiệt ", text)
-    sorted_items = sorted(replacement_dictionary.items(), key=lambda x: len(x[0]), reverse=True)
-    for original, token in sorted_items:
-        pattern = re.compile(r"\b" + re.escape(original) + r"\b", re.IGNORECASE)
-        text = pattern.sub(token, text)
-    return text
+    text = KIET_SLASH_PATTERN.sub(" kiệt ", text)
+    return get_phrase_replacer(replacement_dictionary).replace(text)
 
 
 def translate_sentences(text: str, dictionary: dict):
-    tokenized_text = replace_tokens(text, dictionary)
+    replacer = get_phrase_replacer(dictionary)
+    tokenized_text = replace_tokens(text, replacer)
 
     list_token_tokenized_text = tokenized_text.split()
     token_diacritic_map = {}
-    no_diacritic_text = ""
+    no_diacritic_tokens = []
     for index, token in enumerate(list_token_tokenized_text):
         if "_" not in token:
-            token_diacritic_map[remove_diacritic(token)] = index
-            no_diacritic_text += remove_diacritic(token) + " "
-    no_diacritic_text = no_diacritic_text.strip()
+            no_diacritic_token = remove_diacritic(token)
+            token_diacritic_map[no_diacritic_token] = index
+            no_diacritic_tokens.append(no_diacritic_token)
+    no_diacritic_text = " ".join(no_diacritic_tokens).strip()
+
+    # Only joined tokens coming out of the unaccented pass are spliced back, and the unaccented text holds no "_", so
+    # the pass is skipped when no dictionary value is a joined token.
+    if not replacer.has_joined_tokens:
+        return " ".join(list_token_tokenized_text)
 
-    no_diacritic_tokenized_text = replace_tokens(no_diacritic_text, dictionary)
+    no_diacritic_tokenized_text = replace_tokens(no_diacritic_text, replacer)
     for no_diacritic_token in no_diacritic_tokenized_text.split():
         if "_" in no_diacritic_token:
             start_of_word = float("inf")
@@ -71,27 +102,103 @@ def translate_sentences(text: str, dictionary: dict):
             if not skip:
                 list_token_tokenized_text[start_of_word:end_of_word] = [no_diacritic_token]
 
-    return " ".join([token for token in list_token_tokenized_text])
+    return " ".join(list_token_tokenized_text)
 
 
 def remove_stopwords(text: str, stopwords_dictionary: set):
-    stopwords_regex = "|".join(re.escape(stopword) for stopword in sorted(stopwords_dictionary, key=len, reverse=True))
-    text = re.sub(r"\b(?:" + stopwords_regex + r")(?:\W|$)", " ", text)
+    stopword_remover = (
+        stopwords_dictionary
+        if isinstance(stopwords_dictionary, StopwordRemover)
+        else StopwordRemover(stopwords_dictionary)
+    )
+    text = stopword_remover.remove(text)
     text = text.strip()
-    text = re.sub(r"\s+", " ", text)
+    text = WHITESPACE_PATTERN.sub(" ", text)
     return text
 
 
-def preprocessing(
-    text: str,
-    is_process_entity: bool = False,
-    tokenize_dictionary: dict = read_tokenize_dictionary(),
-    stopwords_dictionary: set = read_stop_word_dictionary(),
-    acronym_dictionary: dict = read_acronym_dictionary(),
-):
-    text = lowercase_text(text)
-    text = translate_sentences(text, acronym_dictionary)
-    if is_process_entity:
-        text = translate_sentences(text, tokenize_dictionary)
-        text = remove_stopwords(text, stopwords_dictionary)
-    return text
+class Preprocessor:
+    def __init__(
+        self,
+        tokenize_dictionary_path: str = "src/models/utils/tokenize_dictionary.json",
+        stopwords_dictionary_path: str = "src/models/utils/vietnamese-stopwords.txt",
+        acronym_dictionary_path: str = "src/models/utils/acronym_dictionary.json",
+    ):
+        self.tokenize_dictionary_path = tokenize_dictionary_path
+        self.stopwords_dictionary_path = stopwords_dictionary_path
+        self.acronym_dictionary_path = acronym_dictionary_path
+        self._tokenize_replacer = None
+        self._acronym_replacer = None
+        self._stopword_remover = None
+        self._lock = threading.Lock()
+
+    @property
+    def tokenize_replacer(self) -> PhraseReplacer:
+        if self._tokenize_replacer is None:
+            with self._lock:
+                if self._tokenize_replacer is None:
+                    self._tokenize_replacer = PhraseReplacer(read_tokenize_dictionary(self.tokenize_dictionary_path))
+        return self._tokenize_replacer
+
+    @property
+    def acronym_replacer(self) -> PhraseReplacer:
+        if self._acronym_replacer is None:
+            with self._lock:
+                if self._acronym_replacer is None:
+                    self._acronym_replacer = PhraseReplacer(read_acronym_dictionary(self.acronym_dictionary_path))
+        return self._acronym_replacer
+
+    @property
+    def stopword_remover(self) -> StopwordRemover:
+        if self._stopword_remover is None:
+            with self._lock:
+                if self._stopword_remover is None:
+                    self._stopword_remover = StopwordRemover(read_stop_word_dictionary(self.stopwords_dictionary_path))
+        return self._stopword_remover
+
+    def normalize(self, text: str) -> str:
+        text = lowercase_text(text)
+        return translate_sentences(text, self.acronym_replacer)
+
+    def tokenize_entities(self, normalized_text: str) -> str:
+        text = translate_sentences(normalized_text, self.tokenize_replacer)
+        return remove_stopwords(text, self.stopword_remover)
+
+    def process(self, text: str, is_process_entity: bool = False) -> str:
+        text = self.normalize(text)
+        if is_process_entity:
+            text = self.tokenize_entities(text)
+        return text
+
+    def process_batch(self, texts: list, is_process_entity: bool = False) -> list:
+        return [self.process(text, is_process_entity) for text in texts]
+
+    def prepare(self, text: str) -> "PreprocessedMessage":
+        return PreprocessedMessage(text, self)
+
+
+class PreprocessedMessage:
+    def __init__(self, text: str, preprocessor: Preprocessor):
+        self.text = text
+        self.preprocessor = preprocessor
+        self._intent_text = None
+        self._entity_text = None
+
+    @property
+    def intent_text(self) -> str:
+        if self._intent_text is None:
+            self._intent_text = self.preprocessor.normalize(self.text)
+        return self._intent_text
+
+    @property
+    def entity_text(self) -> str:
+        if self._entity_text is None:
+            self._entity_text = self.preprocessor.tokenize_entities(self.intent_text)
+        return self._entity_text
+
+
+default_preprocessor = Preprocessor()
+
+
+def preprocessing(text: str, is_process_entity: bool = False):
+    return default_preprocessor.process(text, is_process_entity)
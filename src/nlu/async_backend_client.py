@@ -0,0 +1,121 @@
+import asyncio
+import json
+import random
+
+import aiohttp
+import requests
+
+from nlu.backend_client import IDEMPOTENT_METHODS, RETRY_STATUS_CODES
+
+
+class BackendResponse:
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncBackendClient:
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.2,
+    ):
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.session = None
+        self.loop = None
+
+    async def start(self):
+        if self.session is None:
+            self.loop = asyncio.get_running_loop()
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size), timeout=self.timeout
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def get_retry_delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff_seconds * 2**attempt)
+
+    async def request(self, method: str, url: str, **kwargs) -> BackendResponse:
+        await self.start()
+        method = method.upper()
+        # Same policy as BackendClient: a POST is only retried when the connection could not be opened (refused or
+        # connect timeout).
+        retriable_errors = (
+            (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+            if method in IDEMPOTENT_METHODS
+            else (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+        )
+        for attempt in range(self.max_retries + 1):
+            is_last_attempt = attempt == self.max_retries
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    backend_response = BackendResponse(response.status, await response.read())
+            except retriable_errors:
+                if is_last_attempt:
+                    raise
+            else:
+                is_retriable = method in IDEMPOTENT_METHODS and backend_response.status_code in RETRY_STATUS_CODES
+                if is_last_attempt or not is_retriable:
+                    return backend_response
+            await asyncio.sleep(self.get_retry_delay(attempt))
+
+    async def get(self, url: str, **kwargs) -> BackendResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> BackendResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> BackendResponse:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> BackendResponse:
+        return await self.request("DELETE", url, **kwargs)
+
+
+class EventLoopBackendClient:
+    # Synchronous BackendClient interface for Chatbot turns running in a worker thread (handle_message_async): every
+    # call is sent to the AsyncBackendClient on the event loop, so the HTTP I/O itself never blocks the loop.
+    def __init__(self, async_client: AsyncBackendClient):
+        self.async_client = async_client
+
+    def request(self, method: str, url: str, **kwargs) -> BackendResponse:
+        loop = self.async_client.loop
+        if loop is None:
+            raise RuntimeError("AsyncBackendClient.start() must be awaited before handling messages")
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            raise RuntimeError("Use Chatbot.handle_message_async when the backend client runs on the event loop")
+        future = asyncio.run_coroutine_threadsafe(self.async_client.request(method, url, **kwargs), loop)
+        try:
+            return future.result()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Chatbot handles backend failures as requests exceptions, whichever client made the call.
+            raise requests.ConnectionError(str(e)) from e
+
+    def get(self, url: str, **kwargs) -> BackendResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> BackendResponse:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> BackendResponse:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> BackendResponse:
+        return self.request("DELETE", url, **kwargs)
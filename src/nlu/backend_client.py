@@ -0,0 +1,72 @@
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+RETRY_STATUS_CODES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+
+
+def is_connect_error(error: requests.RequestException) -> bool:
+    # The connection was refused or timed out while opening, so nothing reached the backend.
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class BackendClient:
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.2,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_retry_delay(self, attempt: int) -> float:
+        # Exponential backoff with full jitter, so retries from concurrent turns do not hit the service together.
+        return random.uniform(0, self.backoff_seconds * 2**attempt)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        method = method.upper()
+        for attempt in range(self.max_retries + 1):
+            is_last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # A POST that failed after connecting may still have been applied, so it is only retried when the
+                # connection could not be opened (refused or connect timeout).
+                if is_last_attempt or not (method in IDEMPOTENT_METHODS or is_connect_error(e)):
+                    raise
+            else:
+                is_retriable = method in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUS_CODES
+                if is_last_attempt or not is_retriable:
+                    return response
+                response.close()
+            time.sleep(self.get_retry_delay(attempt))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -1,12 +1,26 @@
+import asyncio
+import contextlib
+import copy
 import json
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 import requests
-import torch
 
-from models.entities.entities_recognizer import EntitiesRecognizer
-from models.intents.intents_recognizer import IntentsRecognizer
-from models.utils.preprocessing import preprocessing
+from models.entities.entities_recognizer import (
+    EntitiesRecognizer,
+    EntityResult,
+)
+from models.intents.engines import ShadowIntentEngine, load_intent_engine
+from models.intents.evaluation import read_intent_dataset
+from models.intents.tokenization import BoundedCache
+from models.utils.preprocessing import (
+    PreprocessedMessage,
+    default_preprocessor,
+)
+from nlu.backend_client import BackendClient
 from nlu.payload.requests import RequestPayloadCartItem
 from nlu.payload.responses import (
     ResponsePayloadCart,
@@ -14,6 +28,7 @@ from nlu.payload.responses import (
     ResponsePayloadOptionDetail,
     ResponsePayloadProduct,
 )
+from nlu.result_cache import MISSING, NLUResultCache
 from utils.api_url import APIUrls
 from utils.correct_entity_name import (
     get_correct_crust_type,
@@ -24,7 +39,8 @@ from utils.correct_entity_name import (
 )
 from utils.invalid_product import InvalidProduct
 
-device = torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
+if TYPE_CHECKING:
+    from nlu.intent_scheduler import IntentBatchScheduler
 
 
 class Chatbot:
@@ -34,11 +50,53 @@ class Chatbot:
         model_customer_entity_path: str,
         model_intent_path: str,
         responses_template_path: str,
+        result_cache_size: int = 1024,
+        result_cache_ttl: float = 600,
+        intent_backend: str = "torch",
+        intent_num_threads: int = 0,
+        intent_deterministic: bool = False,
+        intent_tokenizer_path: str = "vinai/phobert-base",
+        intent_tokenizer_check_path: str = None,
+        shadow_intent_backend: str = None,
+        shadow_intent_model_path: str = None,
+        shadow_sample_rate: float = 0.1,
+        backend_client: BackendClient = None,
+        max_concurrent_turns: int = 8,
+        max_sessions: int = 10000,
     ):
+        self.preprocessor = default_preprocessor
+        self.backend_client = backend_client or BackendClient()
+        self.turn_executor = ThreadPoolExecutor(max_workers=max_concurrent_turns, thread_name_prefix="chatbot-turn")
+        self.inference_lock = threading.Lock()
+        self.intent_backend = intent_backend
+        self.intent_num_threads = intent_num_threads
+        self.intent_deterministic = intent_deterministic
+        self.intent_tokenizer_path = intent_tokenizer_path
+        self.shadow_intent_backend = shadow_intent_backend
+        self.shadow_intent_model_path = shadow_intent_model_path
+        self.shadow_sample_rate = shadow_sample_rate
         self.model_order_entity = self._load_model_entity(model_order_entity_path, True)
         self.model_customer_entity = self._load_model_entity(model_customer_entity_path, False)
         self.model_intent = self._load_model_intent(model_intent_path)
+        if intent_tokenizer_check_path:
+            self._enable_fast_intent_tokenizer(intent_tokenizer_check_path)
         self.responses_template = self._load_response_template(responses_template_path)
+        artifact_paths = [
+            model_order_entity_path,
+            model_customer_entity_path,
+            model_intent_path,
+            intent_tokenizer_path,
+            self.preprocessor.tokenize_dictionary_path,
+            self.preprocessor.stopwords_dictionary_path,
+            self.preprocessor.acronym_dictionary_path,
+        ]
+        if shadow_intent_backend:
+            artifact_paths.append(shadow_intent_model_path)
+        self.result_cache = NLUResultCache(
+            artifact_paths,
+            max_size=result_cache_size,
+            ttl_seconds=result_cache_ttl,
+        )
         self.pending_information = {
             "add_to_cart": [],
             "provide_info": {},
@@ -47,40 +105,84 @@ class Chatbot:
         }
         self.pending_cus_info = False
         self.pending_confirmation = None
+        self.initial_conversation_state = copy.deepcopy(self.get_conversation_state())
+        self.session_states = BoundedCache(max_sessions)
+        self.session_locks = {}
 
     def _load_model_entity(self, model_path: str, is_order: bool) -> EntitiesRecognizer:
-        model = EntitiesRecognizer(model_path, is_order)
+        model = EntitiesRecognizer(model_path, is_order, self.preprocessor)
         return model
 
-    def _load_model_intent(self, model_path: str) -> IntentsRecognizer:
-        model = IntentsRecognizer()
-        model.load_state_dict(torch.load(model_path))
-        return model.to(device)
+    def _load_model_intent(self, model_path: str):
+        model = load_intent_engine(
+            self.intent_backend,
+            model_path,
+            self.preprocessor,
+            self.intent_num_threads,
+            self.intent_tokenizer_path,
+            self.intent_deterministic,
+        )
+        if not self.shadow_intent_backend:
+            return model
+        shadow_model = load_intent_engine(
+            self.shadow_intent_backend,
+            self.shadow_intent_model_path,
+            self.preprocessor,
+            self.intent_num_threads,
+            self.intent_tokenizer_path,
+            self.intent_deterministic,
+        )
+        return ShadowIntentEngine(
+            model, shadow_model, self.intent_backend, self.shadow_intent_backend, self.shadow_sample_rate
+        )
+
+    def _enable_fast_intent_tokenizer(self, check_data_path: str) -> bool:
+        texts, _ = read_intent_dataset(check_data_path)
+        enabled = self.model_intent.intent_tokenizer.enable_fast_tokenizer(self.preprocessor.process_batch(texts))
+        if enabled:
+            print(f"Fast intent tokenizer enabled, it matched the slow tokenizer on {len(texts)} texts")
+        else:
+            print(f"Fast intent tokenizer not enabled, it is unavailable or differs on {check_data_path}")
+        return enabled
 
     def _load_response_template(self, responses_template_path: str) -> dict:
         with open(responses_template_path, "r", encoding="utf-8") as file:
             return json.load(file)
 
-    def identify_intent(self, message: str) -> str:
-        return self.model_intent.predict(preprocessing(message))
-
-    def identify_order_entities(self, message: str, check_field: list) -> dict:
-        entities = self.model_order_entity.predict(preprocessing(message, True))
-        return self.verify_product_info(entities, check_field)
-
-    def identify_order_entities_with_index(self, message: str, check_field: list) -> dict:
-        entities = self.model_order_entity.predict_order_with_index(preprocessing(message, True))
-        return self.verify_product_info_with_index(entities, check_field)
-
-    def identify_customer_entities(self, message: str) -> dict:
-        entities = self.model_customer_entity.predict(preprocessing(message, True))
+    def _predict_with_cache(self, kind: str, message: PreprocessedMessage, predict):
+        result = self.result_cache.get(kind, message.text)
+        if result is MISSING:
+            # Turns of different sessions run in parallel threads, the models predict one message at a time.
+            with self.inference_lock:
+                result = predict(message)
+            self.result_cache.put(kind, message.text, result)
+        if isinstance(result, dict):
+            return {label: list(values) for label, values in result.items()}
+        return result
+
+    def identify_intent(self, message: PreprocessedMessage) -> str:
+        return self._predict_with_cache("intent", message, self.model_intent.predict)
+
+    def identify_order_entity_result(self, message: PreprocessedMessage) -> EntityResult:
+        return self._predict_with_cache("order_entities", message, self.model_order_entity.predict_result)
+
+    def identify_order_entities(self, message: PreprocessedMessage, check_field: list) -> dict:
+        entity_result = self.identify_order_entity_result(message)
+        return self.verify_product_info(entity_result.get_grouped(), check_field, entity_result)
+
+    def identify_order_entities_with_index(self, message: PreprocessedMessage, check_field: list) -> dict:
+        entity_result = self.identify_order_entity_result(message)
+        return self.verify_product_info_with_index(entity_result.get_indexed(), check_field, entity_result)
+
+    def identify_customer_entities(self, message: PreprocessedMessage) -> dict:
+        entities = self._predict_with_cache("customer_entities", message, self.model_customer_entity.predict)
         return self.clean_customer_entities(entities)
 
     def get_specified_pizza(self, pizza_name: str, size: str = None) -> ResponsePayloadProduct:
         request_url = APIUrls.PRODUCT_SERVICE.value + f"&name.contains=pizza {pizza_name}"
         if size:
             request_url += "&size.equals=" + size.upper()
-        response = requests.get(request_url)
+        response = self.backend_client.get(request_url)
 
         if response.status_code == 200 and response.json():
             return ResponsePayloadProduct.from_json(response.json()[0])
@@ -88,35 +190,39 @@ class Chatbot:
             raise InvalidProduct("Hệ thống xảy ra lỗi khi tải thông tin pizza " + pizza_name, "API")
 
     def get_full_menu_pizza(self) -> list[ResponsePayloadProduct]:
-        response = requests.get(APIUrls.PRODUCT_SERVICE.value)
+        response = self.backend_client.get(APIUrls.PRODUCT_SERVICE.value)
         if response.status_code == 200 and response.json():
             return [ResponsePayloadProduct.from_json(pizza) for pizza in response.json() if not pizza["size"]]
         elif response.status_code != 200:
             raise InvalidProduct("Hệ thống xảy ra lỗi khi tải thông tin toàn bộ pizza", "API")
 
     def get_active_cart(self, user_id: int) -> ResponsePayloadCart:
-        response = requests.get(APIUrls.CART_SERVICE.value + f"?userId.equals={str(user_id)}&status.equals=ACTIVE")
+        response = self.backend_client.get(
+            APIUrls.CART_SERVICE.value + f"?userId.equals={str(user_id)}&status.equals=ACTIVE"
+        )
         if response.status_code == 200 and response.json():
             return ResponsePayloadCart.from_json(response.json()[0])
         elif response.status_code != 200:
             raise InvalidProduct("Hệ thống xảy ra lỗi khi tải thông tin giỏ hàng của bạn", "API")
 
     def get_full_topping(self, size: str) -> list[ResponsePayloadOptionDetail]:
-        response = requests.get(APIUrls.OPTION_DETAIL_SERVICE.value + f"?optionId.equals=2&size.equals={size}")
+        response = self.backend_client.get(
+            APIUrls.OPTION_DETAIL_SERVICE.value + f"?optionId.equals=2&size.equals={size}"
+        )
         if response.status_code == 200 and response.json():
             return [ResponsePayloadOptionDetail.from_json(topping) for topping in response.json()]
         elif response.status_code != 200:
             raise InvalidProduct("Hệ thống xảy ra lỗi khi tải thông tin toppings", "API")
 
     def get_all_cart_items(self, cart_id: int) -> list[ResponsePayloadCartItem]:
-        response = requests.get(APIUrls.CART_ITEM_SERVICE.value + f"/all?cartId.equals={cart_id}")
+        response = self.backend_client.get(APIUrls.CART_ITEM_SERVICE.value + f"/all?cartId.equals={cart_id}")
         if response.status_code == 200 and response.json():
             return [ResponsePayloadCartItem.from_json(cart_item) for cart_item in response.json()]
         elif response.status_code != 200:
             raise InvalidProduct("Hệ thống xảy ra lỗi khi tải thông tin chi tiết giỏ hàng của bạn", "API")
 
     def get_specified_cart_item(self, cart_item_id: int) -> ResponsePayloadCartItem:
-        response = requests.get(APIUrls.CART_ITEM_SERVICE.value + f"/{str(cart_item_id)}")
+        response = self.backend_client.get(APIUrls.CART_ITEM_SERVICE.value + f"/{str(cart_item_id)}")
         if response.status_code == 200 and response.json():
             return ResponsePayloadCartItem.from_json(response.json())
         elif response.status_code != 200:
@@ -134,7 +240,7 @@ class Chatbot:
         return topping_ids
 
     def post_cart_item(self, cart_item: RequestPayloadCartItem) -> None:
-        response = requests.post(APIUrls.CART_ITEM_SERVICE.value, json=cart_item.to_dict())
+        response = self.backend_client.post(APIUrls.CART_ITEM_SERVICE.value, json=cart_item.to_dict())
         if response.status_code == 201:
             return None
         raise InvalidProduct("Hệ thống xảy ra lỗi khi thêm món vào giỏ hàng", "API")
@@ -170,13 +276,15 @@ class Chatbot:
             product_id=pizza_info.id,
             option_detail_ids=option_detail_ids,
         )
-        response = requests.put(APIUrls.CART_ITEM_SERVICE.value + "/" + str(cart_item_id), json=cart_item_dto.to_dict())
+        response = self.backend_client.put(
+            APIUrls.CART_ITEM_SERVICE.value + "/" + str(cart_item_id), json=cart_item_dto.to_dict()
+        )
         if response.status_code == 204:
             return None
         raise InvalidProduct("Hệ thống xảy ra lỗi khi sửa món trong giỏ hàng", "API")
 
     def delete_cart_item(self, cart_item_id: int) -> None:
-        response = requests.delete(APIUrls.CART_ITEM_SERVICE.value + "/" + str(cart_item_id))
+        response = self.backend_client.delete(APIUrls.CART_ITEM_SERVICE.value + "/" + str(cart_item_id))
         if response.status_code == 204:
             return None
         raise InvalidProduct("Hệ thống xảy ra lỗi khi xoá món khỏi giỏ hàng", "API")
@@ -230,40 +338,59 @@ class Chatbot:
         details_response = "\n".join([f"{key}: {value}" for key, value in details.items()])
         return details_response
 
-    def verify_product_info(self, entities: dict, check_field: list) -> dict:
+    @staticmethod
+    def correct_entity_words(entity_result: EntityResult, label: str, words: list, correct):
+        # With the EntityResult the words came from, the correction is shared by its grouped and indexed views.
+        if entity_result is None:
+            return correct(words)
+        corrected = entity_result.get_corrected(label, correct)
+        if isinstance(corrected, tuple):
+            return tuple(list(values) for values in corrected)
+        return list(corrected)
+
+    def verify_product_info(self, entities: dict, check_field: list, entity_result: EntityResult = None) -> dict:
+        def correct(key, func):
+            return self.correct_entity_words(entity_result, key, entities[key], func)
+
         if "Pizza" in entities:
-            valid_pizzas, invalid_pizzas = get_correct_pizza_name(entities["Pizza"])
+            valid_pizzas, invalid_pizzas = correct("Pizza", get_correct_pizza_name)
             if invalid_pizzas and "Pizza" in check_field:
                 raise InvalidProduct(invalid_pizzas, "Pizza")
             entities["Pizza"] = valid_pizzas
 
         if "Quantity" in entities:
-            entities["Quantity"] = get_quantity_in_number(entities["Quantity"])
+            quantities = [quantity for quantity in correct("Quantity", get_quantity_in_number) if quantity is not None]
+            if quantities:
+                entities["Quantity"] = quantities
+            else:
+                del entities["Quantity"]
 
         if "Size" in entities:
-            valid_sizes, invalid_sizes = get_correct_size(entities["Size"])
+            valid_sizes, invalid_sizes = correct("Size", get_correct_size)
             if invalid_sizes and "Size" in check_field:
                 raise InvalidProduct(invalid_sizes, "Size")
             entities["Size"] = valid_sizes
 
         if "Crust" in entities:
-            valid_crusts, invalid_crusts = get_correct_crust_type(entities["Crust"])
+            valid_crusts, invalid_crusts = correct("Crust", get_correct_crust_type)
             if invalid_crusts and "Crust" in check_field:
                 raise InvalidProduct(invalid_crusts, "Crust")
             entities["Crust"] = valid_crusts
 
         if "Topping" in entities:
-            valid_toppings, invalid_toppings = get_correct_topping_name(entities["Topping"])
+            valid_toppings, invalid_toppings = correct("Topping", get_correct_topping_name)
             if invalid_toppings and "Topping" in check_field:
                 raise InvalidProduct(invalid_toppings, "Topping")
             entities["Topping"] = valid_toppings
         return entities
 
-    def verify_product_info_with_index(self, entities: dict, check_field: list) -> dict:
+    def verify_product_info_with_index(
+        self, entities: dict, check_field: list, entity_result: EntityResult = None
+    ) -> dict:
         def update_entities(key, func, check_field, index_field=1):
             if key in entities:
                 values = [item[0] for item in entities[key]]
-                valid_values, invalid_values = func(values)
+                valid_values, invalid_values = self.correct_entity_words(entity_result, key, values, func)
                 if invalid_values and key in check_field:
                     raise InvalidProduct(invalid_values, key)
                 entities[key] = [(valid_values[i], entities[key][i][index_field]) for i in range(len(valid_values))]
@@ -275,10 +402,16 @@ class Chatbot:
 
         if "Quantity" in entities:
             quantities = [item[0] for item in entities["Quantity"]]
-            quantities_in_number = get_quantity_in_number(quantities)
+            quantities_in_number = self.correct_entity_words(
+                entity_result, "Quantity", quantities, get_quantity_in_number
+            )
             entities["Quantity"] = [
-                (quantities_in_number[i], entities["Quantity"][i][1]) for i in range(len(quantities))
+                (quantities_in_number[i], entities["Quantity"][i][1])
+                for i in range(len(quantities))
+                if quantities_in_number[i] is not None
             ]
+            if not entities["Quantity"]:
+                del entities["Quantity"]
 
         return entities
 
@@ -294,7 +427,7 @@ class Chatbot:
 
         return entities
 
-    def handle_view_menu(self, message: str) -> str:
+    def handle_view_menu(self, message: PreprocessedMessage) -> str:
         entities_with_index = self.identify_order_entities_with_index(message, ["Pizza", "Size"])
 
         if "Pizza" in entities_with_index:
@@ -331,7 +464,7 @@ class Chatbot:
             )
             return f"{response}\n{menu_details}"
 
-    def handle_view_cart(self, message: str) -> str:
+    def handle_view_cart(self, message: PreprocessedMessage) -> str:
         entities = self.identify_order_entities(message, ["Pizza"])
 
         cart_info = self.get_active_cart(1)
@@ -388,7 +521,7 @@ class Chatbot:
     def _process_single_pizza(self, entities: dict) -> dict:
         cart_item = {}
         cart_item["Pizza"] = entities["Pizza"][0] if "Pizza" in entities else None
-        cart_item["Quantity"] = int(entities["Quantity"][0]) if "Quantity" in entities else None
+        cart_item["Quantity"] = entities["Quantity"][0] if "Quantity" in entities else None
         cart_item["Size"] = entities["Size"][0] if "Size" in entities else None
         cart_item["Crust"] = entities["Crust"][0] if "Crust" in entities else None
         cart_item["Topping"] = entities["Topping"] if "Topping" in entities else []
@@ -495,17 +628,20 @@ class Chatbot:
             return False
         return True
 
-    def _build_cart_items_detail(self, message: str) -> list:
-        entities = self.identify_order_entities(message, ["Pizza", "Size", "Crust", "Topping"])
+    def _build_cart_items_detail(self, message: PreprocessedMessage) -> list:
+        entity_result = self.identify_order_entity_result(message)
+        entities = self.verify_product_info(
+            entity_result.get_grouped(), ["Pizza", "Size", "Crust", "Topping"], entity_result
+        )
         if self.is_single_pizza(entities):
             self.pending_information["add_to_cart"].extend(self._process_single_pizza(entities))
         else:
-            entities_with_index = self.identify_order_entities_with_index(
-                message, ["Pizza", "Size", "Crust", "Topping"]
+            entities_with_index = self.verify_product_info_with_index(
+                entity_result.get_indexed(), ["Pizza", "Size", "Crust", "Topping"], entity_result
             )
             self.pending_information["add_to_cart"].extend(self._process_multiple_pizzas(entities_with_index))
 
-    def handle_add_to_cart(self, message: str) -> str:
+    def handle_add_to_cart(self, message: PreprocessedMessage) -> str:
         self._build_cart_items_detail(message)
         header = "Dựa vào yêu cầu của bạn, có vẻ như bạn muốn đặt các món như sau:"
         footer = "Nếu đúng, bạn nhắn 'Y' để xác nhận nha. Nếu có gì sai, bạn nhắn 'N' giúp mình nhé."
@@ -597,9 +733,9 @@ class Chatbot:
             topping=(("kèm " + ", ".join(cart_item.get("Topping"))) if not topping else "không topping thêm"),
         )
 
-    def handle_pending_information_cart_item(self, message: str) -> str:
+    def handle_pending_information_cart_item(self, message: PreprocessedMessage) -> str:
         entities = self.identify_order_entities(message, ["Pizza", "Size", "Crust", "Topping"])
-        if "không topping" in message:
+        if "không topping" in message.text:
             self.pending_information["add_to_cart"][0]["Topping"] = ["Không"]
 
         fields = ["Pizza", "Quantity", "Size", "Crust", "Topping"]
@@ -618,7 +754,7 @@ class Chatbot:
         if not self.is_cart_item_missing_info(self.pending_information["add_to_cart"][0]):
             return self.check_missing_info_cart_item(False)
 
-    def handle_remove_from_cart(self, message: str) -> str:
+    def handle_remove_from_cart(self, message: PreprocessedMessage) -> str:
         entities = self.identify_order_entities(message, ["Pizza"])
 
         cart_info = self.get_active_cart(1)
@@ -786,13 +922,16 @@ class Chatbot:
             response.append(self.ask_for_confused_pizza(action_type))
         return "\n --------------------------------------------------------- \n".join(response)
 
-    def handle_modify_cart_item(self, message: str) -> str:
-        entities = self.identify_order_entities(message, ["Pizza", "Size", "Crust", "Topping"])
+    def handle_modify_cart_item(self, message: PreprocessedMessage) -> str:
+        entity_result = self.identify_order_entity_result(message)
+        entities = self.verify_product_info(
+            entity_result.get_grouped(), ["Pizza", "Size", "Crust", "Topping"], entity_result
+        )
         if self.is_single_pizza(entities):
             parsed_items = self._process_single_pizza(entities)
         else:
-            entities_with_index = self.identify_order_entities_with_index(
-                message, ["Pizza", "Size", "Crust", "Topping"]
+            entities_with_index = self.verify_product_info_with_index(
+                entity_result.get_indexed(), ["Pizza", "Size", "Crust", "Topping"], entity_result
             )
             parsed_items = self._process_multiple_pizzas(entities_with_index)
 
@@ -886,7 +1025,7 @@ class Chatbot:
     def handle_cancel_order(self):
         return random.choice(self.responses_template["cancel_order"]["unknown"])
 
-    def handle_provide_info(self, message: str) -> str:
+    def handle_provide_info(self, message: PreprocessedMessage) -> str:
         entities = self.identify_customer_entities(message)
         fields = ["Cus", "Address", "Phone", "Payment"]
         missing_info = []
@@ -912,7 +1051,7 @@ class Chatbot:
             missing_entity=", ".join(missing_info)
         )
 
-    def handle_pending_information_provide_info(self, message: str) -> str:
+    def handle_pending_information_provide_info(self, message: PreprocessedMessage) -> str:
         entities = self.identify_customer_entities(message)
 
         fields = ["Cus", "Address", "Phone", "Payment"]
@@ -972,21 +1111,94 @@ class Chatbot:
             response = random.choice(self.responses_template["yes_no_loop"])
         return response
 
+    def get_conversation_state(self) -> dict:
+        return {
+            "pending_information": self.pending_information,
+            "pending_cus_info": self.pending_cus_info,
+            "pending_confirmation": self.pending_confirmation,
+        }
+
+    def set_conversation_state(self, state: dict):
+        self.pending_information = state["pending_information"]
+        self.pending_cus_info = state["pending_cus_info"]
+        self.pending_confirmation = state["pending_confirmation"]
+
+    def is_waiting_for_intent(self) -> bool:
+        return not (
+            self.pending_cus_info
+            or 0 < len(self.pending_information["provide_info"]) < 4
+            or self.pending_confirmation
+            or self.pending_information["add_to_cart"]
+            or self.pending_information["remove_from_cart"]
+            or self.pending_information["modify_cart_item"]
+        )
+
+    def get_session_chatbot(self, session_key: str) -> "Chatbot":
+        # A shallow copy shares the models, caches and backend client, and holds the conversation state of one session.
+        if session_key not in self.session_states:
+            self.session_states[session_key] = copy.deepcopy(self.initial_conversation_state)
+        session_chatbot = copy.copy(self)
+        session_chatbot.set_conversation_state(self.session_states[session_key])
+        return session_chatbot
+
+    @contextlib.asynccontextmanager
+    async def session_turn(self, session_key: str):
+        # Turns of one session run in arrival order, turns of different sessions overlap. An idle session drops its lock.
+        entry = self.session_locks.setdefault(session_key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.session_locks[session_key]
+
+    async def prefetch_intent(
+        self, message: str, intent_scheduler: "IntentBatchScheduler", session_key: str = ""
+    ) -> None:
+        # The state is read after the turns already queued for the session.
+        async with self.session_turn(session_key):
+            is_waiting_for_intent = self.get_session_chatbot(session_key).is_waiting_for_intent()
+        if not is_waiting_for_intent or self.result_cache.peek("intent", message) is not MISSING:
+            return None
+        try:
+            message_intent = await intent_scheduler.predict(message)
+        except Exception as e:
+            # A failed batch only loses the prefetch: handle_message runs its own inference for this message.
+            print(f"Intent prefetch failed: {e}")
+            return None
+        self.result_cache.put("intent", message, message_intent)
+
+    async def handle_message_async(self, message: str, session_key: str = "") -> str:
+        # The turn runs in a thread off the event loop, on a copy of the Chatbot holding the state of its session, so
+        # turns of different sessions overlap. With an EventLoopBackendClient their HTTP calls go back to the loop's
+        # pooled aiohttp session.
+        async with self.session_turn(session_key):
+            session_chatbot = self.get_session_chatbot(session_key)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.turn_executor, session_chatbot.handle_message, message
+                )
+            finally:
+                self.session_states[session_key] = session_chatbot.get_conversation_state()
+
     def handle_message(self, message: str):
+        preprocessed_message = self.preprocessor.prepare(message)
         try:
             if self.pending_cus_info or 0 < len(self.pending_information["provide_info"]) < 4:
-                return self.handle_pending_information_provide_info(message)
+                return self.handle_pending_information_provide_info(preprocessed_message)
             if self.pending_confirmation:
                 return self.handle_pending_confirmation(message)
 
             if self.pending_information["add_to_cart"]:
-                return self.handle_pending_information_cart_item(message)
+                return self.handle_pending_information_cart_item(preprocessed_message)
             elif self.pending_information["remove_from_cart"]:
                 return self.choose_pizza_to_take_action(message, "remove_from_cart")
             elif self.pending_information["modify_cart_item"]:
                 return self.choose_pizza_to_take_action(message, "modify_cart_item")
 
-            message_intent = self.identify_intent(message)
+            message_intent = self.identify_intent(preprocessed_message)
             intent_handlers_with_param = {
                 "view_menu": self.handle_view_menu,
                 "view_cart": self.handle_view_cart,
@@ -1003,7 +1215,7 @@ class Chatbot:
             }
 
             if message_intent in intent_handlers_with_param:
-                return intent_handlers_with_param[message_intent](message)
+                return intent_handlers_with_param[message_intent](preprocessed_message)
             elif message_intent in intent_handlers_without_param:
                 return intent_handlers_without_param[message_intent]()
             else:
@@ -1026,3 +1238,6 @@ class Chatbot:
                     )
                 else:
                     return e.product_name
+        except requests.RequestException as e:
+            print(e)
+            return "Hệ thống đang bận, bạn thử lại sau ít phút nhé."
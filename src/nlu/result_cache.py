@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class NLUResultCache:
+    def __init__(
+        self,
+        artifact_paths: list,
+        max_size: int = 1024,
+        ttl_seconds: float = 600,
+        artifact_check_interval: float = 5,
+    ):
+        self.artifact_paths = list(artifact_paths)
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.artifact_check_interval = artifact_check_interval
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+        self._artifact_fingerprint = self._get_artifact_fingerprint()
+        self._last_artifact_check = time.monotonic()
+
+    def _get_artifact_fingerprint(self) -> tuple:
+        # A directory artifact (a packaged model, an exported ONNX model) is fingerprinted by every file inside it, as
+        # replacing the weights or the manifest does not touch the directory itself.
+        fingerprint = []
+        for path in self.artifact_paths:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    fingerprint.extend(self._get_file_fingerprint(os.path.join(root, file)) for file in sorted(files))
+            else:
+                fingerprint.append(self._get_file_fingerprint(path))
+        return tuple(fingerprint)
+
+    @staticmethod
+    def _get_file_fingerprint(path: str) -> tuple:
+        try:
+            stat = os.stat(path)
+            return path, stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return path, None, None
+
+    def _check_artifacts(self, now: float):
+        if now - self._last_artifact_check < self.artifact_check_interval:
+            return
+        self._last_artifact_check = now
+        fingerprint = self._get_artifact_fingerprint()
+        if fingerprint != self._artifact_fingerprint:
+            self._artifact_fingerprint = fingerprint
+            self.entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get(self, kind: str, message: str):
+        key = (kind, message.lower())
+        now = time.monotonic()
+        with self._lock:
+            self._check_artifacts(now)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at < now:
+                del self.entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return MISSING
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def peek(self, kind: str, message: str):
+        # Like get, without counting a hit or a miss or refreshing the entry.
+        key = (kind, message.lower())
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return MISSING
+            return entry[1]
+
+    def put(self, kind: str, message: str, value):
+        key = (kind, message.lower())
+        with self._lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "size": len(self.entries)}
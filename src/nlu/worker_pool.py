@@ -0,0 +1,115 @@
+import copy
+import gc
+import multiprocessing
+import threading
+import zlib
+
+import torch
+import torch.nn as nn
+
+from models.intents.tokenization import BoundedCache
+from nlu.chatbot import Chatbot
+
+
+def share_chatbot_models(chatbot: Chatbot):
+    # Everything the workers read is built before forking: PyTorch parameters are moved into shared memory, the CRF
+    # models and preprocessing tables stay copy-on-write, and gc.freeze keeps the collector from writing to those
+    # pages in every worker.
+    if isinstance(chatbot.model_intent, nn.Module):
+        chatbot.model_intent.share_memory()
+    chatbot.preprocessor.process("xem menu", True)
+    gc.collect()
+    gc.freeze()
+
+
+def serve_chatbot(chatbot: Chatbot, connection, num_threads: int, max_sessions: int):
+    # A worker serves several sessions with one Chatbot, so the conversation state of each session is kept here and
+    # swapped in around its turn. Only the most recently active sessions are kept; an evicted session starts over.
+    torch.set_num_threads(num_threads)
+    initial_state = copy.deepcopy(chatbot.get_conversation_state())
+    session_states = BoundedCache(max_sessions)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        session_key, message = request
+        if session_key not in session_states:
+            session_states[session_key] = copy.deepcopy(initial_state)
+        chatbot.set_conversation_state(session_states[session_key])
+        try:
+            connection.send((True, chatbot.handle_message(message)))
+        except Exception as e:
+            connection.send((False, str(e)))
+        finally:
+            session_states[session_key] = chatbot.get_conversation_state()
+
+
+class ChatbotWorkerPool:
+    def __init__(
+        self, chatbot: Chatbot, num_workers: int, num_threads_per_worker: int = 1, max_sessions_per_worker: int = 10000
+    ):
+        share_chatbot_models(chatbot)
+        self.chatbot = chatbot
+        self.num_threads_per_worker = num_threads_per_worker
+        self.max_sessions_per_worker = max_sessions_per_worker
+        self.context = multiprocessing.get_context("fork")
+        self.connections = [None] * num_workers
+        self.processes = [None] * num_workers
+        self.locks = [threading.Lock() for _ in range(num_workers)]
+        for index in range(num_workers):
+            self._start_worker(index)
+
+    def _start_worker(self, index: int):
+        parent_connection, child_connection = self.context.Pipe()
+        process = self.context.Process(
+            target=serve_chatbot,
+            args=(self.chatbot, child_connection, self.num_threads_per_worker, self.max_sessions_per_worker),
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        if self.connections[index] is not None:
+            self.connections[index].close()
+        self.connections[index] = parent_connection
+        self.processes[index] = process
+
+    def get_worker_index(self, session_key: str) -> int:
+        # Conversation state (pending information and confirmations) is kept per session inside the worker, so a
+        # session always goes to the same worker.
+        return zlib.crc32(session_key.encode("utf-8")) % len(self.connections)
+
+    def handle_message(self, message: str, session_key: str = ""):
+        index = self.get_worker_index(session_key)
+        with self.locks[index]:
+            if not self.processes[index].is_alive():
+                # Died between messages: nothing of this message was handled yet, so it goes to a fresh worker.
+                self._start_worker(index)
+            try:
+                self.connections[index].send((session_key, message))
+                is_success, response = self.connections[index].recv()
+            except (EOFError, OSError) as e:
+                # Died while handling this message, which may have reached the backend already, so it is not retried.
+                self.processes[index].join(timeout=5)
+                exit_code = self.processes[index].exitcode
+                self._start_worker(index)
+                raise RuntimeError(
+                    f"Chatbot worker {index} died (exit code {exit_code}) while handling a message and was restarted, "
+                    "the conversations it served start over"
+                ) from e
+        if not is_success:
+            raise RuntimeError(response)
+        return response
+
+    def close(self):
+        for connection, lock in zip(self.connections, self.locks):
+            with lock:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+        for process in self.processes:
+            process.join(timeout=5)
@@ -1,4 +1,204 @@
-from fuzzywuzzy import fuzz, process
+import re
+from collections import Counter, defaultdict
+
+from fuzzywuzzy import fuzz, utils
+
+NAME_MATCH_THRESHOLD = 80
+
+correct_pizza_names = [
+    "margherita",
+    "hawaiian",
+    "tropicana seafood",
+    "bbq beefy",
+    "bbq chicken",
+    "new oceania",
+    "double cheese burger",
+    "meat lovers",
+    "seafood",
+    "seafood deluxe",
+    "pepperoni",
+]
+
+correct_topping_names = [
+    "phômát",
+    "thịt hun khói",
+    "jăm bông",
+    "gà",
+    "xúc xích Đức",
+    "xúc xích Mỹ",
+    "dứa",
+    "nấm rơm",
+    "ôliu đen",
+    "thịt bò xay",
+    "cá",
+    "tôm",
+    "mực",
+    "ngao",
+    "ớt xanh",
+    "hành tây",
+    "cá thu",
+    "cá cơm",
+    "bắp",
+    "ba chỉ bò nướng",
+    "thanh Cua",
+    "sò điệp",
+]
+
+size_synonyms = {
+    "": ["size", "kích cỡ", "kích thước", "độ lớn", "cỡ", "co"],
+    "s": ["bé", "nhỏ", "be", "nho"],
+    "l": ["vừa", "bình thường", "thường", "trung bình", "vua", "thuong"],
+    "xl": ["lớn", "bự", "to", "lon", "bu"],
+}
+
+crust_synonyms = {
+    "": [
+        "đế bánh",
+        "vỏ bánh",
+        "đáy bánh",
+        "loại bánh",
+        "vỏ pizza",
+        "đế pizza",
+        "đáy pizza",
+        "lớp vỏ",
+        "viền bánh",
+        "viền pizza",
+        "nền bánh",
+        "vỏ đế",
+        "vành bánh",
+        "đế",
+        "de",
+        "vỏ",
+        "vo",
+        "đáy",
+        "day",
+        "loại",
+        "loai",
+        "viền",
+        "vien",
+        "nền",
+        "nen",
+        "vành",
+        "vanh",
+    ],
+}
+
+NUMBER_TOKEN_PATTERN = re.compile(r"\w+")
+numeral_tokens = {
+    "không": ("unit", 0),
+    "khong": ("unit", 0),
+    "một": ("unit", 1),
+    "mot": ("unit", 1),
+    "mốt": ("unit", 1),
+    "hai": ("unit", 2),
+    "ba": ("unit", 3),
+    "bốn": ("unit", 4),
+    "bon": ("unit", 4),
+    "tư": ("unit", 4),
+    "tu": ("unit", 4),
+    "năm": ("unit", 5),
+    "nam": ("unit", 5),
+    "lăm": ("unit", 5),
+    "lam": ("unit", 5),
+    "nhăm": ("unit", 5),
+    "nham": ("unit", 5),
+    "sáu": ("unit", 6),
+    "sau": ("unit", 6),
+    "bảy": ("unit", 7),
+    "bẩy": ("unit", 7),
+    "bay": ("unit", 7),
+    "tám": ("unit", 8),
+    "tam": ("unit", 8),
+    "chín": ("unit", 9),
+    "chin": ("unit", 9),
+    "mười": ("ten", 10),
+    "mươi": ("ten", 10),
+    "muoi": ("ten", 10),
+    "chục": ("ten", 10),
+    "chuc": ("ten", 10),
+    "trăm": ("hundred", 100),
+    "tram": ("hundred", 100),
+    "linh": ("link", None),
+    "lẻ": ("link", None),
+    "le": ("link", None),
+}
+
+
+class SynonymNormalizer:
+    def __init__(self, synonyms: dict):
+        self.replacements = {phrase: value for value, phrases in synonyms.items() for phrase in phrases}
+        phrases = sorted(self.replacements, key=len, reverse=True)
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(re.escape(phrase) for phrase in phrases) + r")(?!\w)")
+
+    def normalize(self, text: str) -> str:
+        # One left-to-right scan, longest phrase first, and only on whole words, so "to" inside "tomato" or "de" inside
+        # "deluxe" stay untouched.
+        text = self.pattern.sub(lambda match: self.replacements[match.group()], text.replace("_", " "))
+        return " ".join(text.split())
+
+
+size_normalizer = SynonymNormalizer(size_synonyms)
+crust_normalizer = SynonymNormalizer(crust_synonyms)
+
+
+def get_ngrams(text: str, ngram_size: int) -> Counter:
+    return Counter(text[i : i + ngram_size] for i in range(len(text) - ngram_size + 1))
+
+
+class NameMatcher:
+    def __init__(self, names: list, score_cutoff: int = NAME_MATCH_THRESHOLD, ngram_size: int = 2):
+        self.names = names
+        self.score_cutoff = score_cutoff
+        self.ngram_size = ngram_size
+        self.processed_names = [utils.full_process(name) for name in names]
+        self.exact_matches = {}
+        self.ngram_index = defaultdict(list)
+        self.indices_by_length = defaultdict(list)
+        for index, processed_name in enumerate(self.processed_names):
+            self.exact_matches.setdefault(processed_name, index)
+            self.indices_by_length[len(processed_name)].append(index)
+            for ngram, count in get_ngrams(processed_name, ngram_size).items():
+                self.ngram_index[ngram].append((index, count))
+
+    def get_candidates(self, query: str) -> list:
+        # fuzz.ratio is 2 * M / (len(a) + len(b)) with M at most the longest common subsequence, so a name can only
+        # reach the cutoff if its indel distance to the query is within max_distance. That bounds the length
+        # difference and, by the q-gram lemma, the number of n-grams both strings must share.
+        shared_ngrams = Counter()
+        for ngram, query_count in get_ngrams(query, self.ngram_size).items():
+            for index, count in self.ngram_index.get(ngram, ()):
+                shared_ngrams[index] += min(query_count, count)
+
+        candidates = []
+        for length, indices in self.indices_by_length.items():
+            total_length = len(query) + length
+            max_distance = total_length * (200 - 2 * self.score_cutoff + 1) // 200
+            if abs(len(query) - length) > max_distance:
+                continue
+            min_shared_ngrams = max(len(query), length) - self.ngram_size + 1 - self.ngram_size * max_distance
+            candidates.extend(index for index in indices if shared_ngrams[index] >= min_shared_ngrams)
+        return sorted(candidates)
+
+    def extract_one(self, query: str):
+        # Same result as process.extractOne(query, names, scorer=fuzz.ratio) whenever the best score reaches the
+        # cutoff; None otherwise.
+        processed_query = utils.full_process(query)
+        exact_index = self.exact_matches.get(processed_query)
+        if exact_index is not None:
+            return self.names[exact_index], 100
+
+        best_match = None
+        for index in self.get_candidates(processed_query):
+            score = fuzz.ratio(processed_query, self.processed_names[index])
+            if best_match is None or score > best_match[1]:
+                best_match = (self.names[index], score)
+        if best_match is None or best_match[1] < self.score_cutoff:
+            return None
+        return best_match
+
+
+pizza_name_matcher = NameMatcher(correct_pizza_names)
+topping_name_matcher = NameMatcher(correct_topping_names)
 
 
 def get_correct_pizza_name(ordered_pizzas: list):
@@ -20,27 +220,13 @@ def get_correct_pizza_name(ordered_pizzas: list):
             .replace("pizza", "")
         )
 
-    correct_pizza_names = [
-        "margherita",
-        "hawaiian",
-        "tropicana seafood",
-        "bbq beefy",
-        "bbq chicken",
-        "new oceania",
-        "double cheese burger",
-        "meat lovers",
-        "seafood",
-        "seafood deluxe",
-        "pepperoni",
-    ]
-
     valid_results = []
     errors = []
 
     for ordered_pizza in ordered_pizzas:
         cleaned_pizza = filter_pizza_name(ordered_pizza)
-        best_match = process.extractOne(cleaned_pizza, correct_pizza_names, scorer=fuzz.ratio)
-        if best_match[1] < 80:
+        best_match = pizza_name_matcher.extract_one(cleaned_pizza)
+        if best_match is None:
             errors.append(ordered_pizza)
         else:
             valid_results.append(best_match[0])
@@ -49,37 +235,11 @@ def get_correct_pizza_name(ordered_pizzas: list):
 
 
 def get_correct_size(specified_sizes: list):
-    def filter_size(specified_size: str):
-        return (
-            specified_size.replace("_", " ")
-            .replace("size", "")
-            .replace("kích cỡ", "")
-            .replace("kích thước", "")
-            .replace("độ lớn", "")
-            .replace("cỡ", "")
-            .replace("bé", "s")
-            .replace("nhỏ", "s")
-            .replace("vừa", "l")
-            .replace("bình thường", "l")
-            .replace("thường", "l")
-            .replace("trung bình", "l")
-            .replace("lớn", "xl")
-            .replace("bự", "xl")
-            .replace("to", "xl")
-            .replace("co", "")
-            .replace("be", "s")
-            .replace("nho", "s")
-            .replace("vua", "l")
-            .replace("thuong", "l")
-            .replace("lon", "xl")
-            .replace("bu", "xl")
-        )
-
     size_name = {"s", "l", "xl"}
     valid_results = []
     errors = []
     for specified_size in specified_sizes:
-        cleaned_size = filter_size(specified_size).strip()
+        cleaned_size = size_normalizer.normalize(specified_size)
         if cleaned_size not in size_name:
             errors.append(cleaned_size)
         else:
@@ -87,102 +247,59 @@ def get_correct_size(specified_sizes: list):
     return valid_results, errors
 
 
-def get_quantity_in_number(ordered_quantities: list):
-    def translate_quantity(ordered_quantity: str):
-        return (
-            ordered_quantity.replace("_", " ")
-            .replace("mười một", 11)
-            .replace("mười hai", 12)
-            .replace("mười ba", 13)
-            .replace("mười bốn", 14)
-            .replace("mười lăm", 15)
-            .replace("mười sáu", 16)
-            .replace("mười bảy", 17)
-            .replace("mười tám", 18)
-            .replace("mười chín", 19)
-            .replace("hai mươi", 20)
-            .replace("không", 0)
-            .replace("một", 1)
-            .replace("hai", 2)
-            .replace("ba", 3)
-            .replace("bốn", 4)
-            .replace("năm", 5)
-            .replace("sáu", 6)
-            .replace("bảy", 7)
-            .replace("tám", 8)
-            .replace("chín", 9)
-            .replace("mười", 10)
-            .replace("muoi mot", 11)
-            .replace("muoi hai", 12)
-            .replace("muoi ba", 13)
-            .replace("muoi bon", 14)
-            .replace("muoi lam", 15)
-            .replace("muoi sau", 16)
-            .replace("muoi bay", 17)
-            .replace("muoi tam", 18)
-            .replace("muoi chin", 19)
-            .replace("hai muoi", 20)
-            .replace("không", 0)
-            .replace("mot", 1)
-            .replace("hai", 2)
-            .replace("ba", 3)
-            .replace("bon", 4)
-            .replace("nam", 5)
-            .replace("sau", 6)
-            .replace("bay", 7)
-            .replace("tam", 8)
-            .replace("chin", 9)
-            .replace("muoi", 10)
-        )
+def parse_vietnamese_number(text: str):
+    value = None
+    unit = None
+    # Lowest place already filled: 100 after "trăm", 10 after "mươi" and 1 after a number written with several digits.
+    place = None
+    for token in NUMBER_TOKEN_PATTERN.findall(text.lower().replace("_", " ")):
+        if token.isdecimal():
+            kind, number = ("unit" if len(token) == 1 else "number"), int(token)
+        else:
+            kind, number = numeral_tokens.get(token, (None, None))
 
-    valid_results = []
-    for ordered_quantity in ordered_quantities:
-        try:
-            valid_results.append(int(ordered_quantity))
-        except ValueError:
-            valid_results.append(translate_quantity(ordered_quantity))
-    return valid_results
+        if kind is None:
+            if value is None and unit is None:
+                continue
+            break
+        if kind == "number":
+            if value is not None or unit is not None:
+                break
+            value = number
+            place = 1
+        elif kind == "unit":
+            if unit is not None or place == 1:
+                break
+            unit = number
+        elif kind == "link":
+            if value is None:
+                break
+        else:
+            # "mười"/"mươi"/"chục" multiply the unit before them ("hai mươi") or stand for a single ten
+            # ("mười lăm"); "trăm" works the same way with hundreds. A place that is already filled makes the whole
+            # text invalid: "mười mười", "hai mươi hai mươi" or "20 mươi" are not numbers.
+            if place is not None and place <= number:
+                return None
+            value = (value or 0) + (1 if unit is None else unit) * number
+            unit = None
+            place = number
 
+    if unit is not None:
+        value = (value or 0) + unit
+    return value
 
-def get_correct_crust_type(specified_crusts: list):
-    def filter_crust(specified_crust: str):
-        return (
-            specified_crust.replace("_", " ")
-            .replace("đế bánh", "")
-            .replace("vỏ bánh", "")
-            .replace("đáy bánh", "")
-            .replace("loại bánh", "")
-            .replace("vỏ pizza", "")
-            .replace("đế pizza", "")
-            .replace("đáy pizza", "")
-            .replace("lớp vỏ", "")
-            .replace("viền bánh", "")
-            .replace("viền pizza", "")
-            .replace("nền bánh", "")
-            .replace("vỏ đế", "")
-            .replace("vành bánh", "")
-            .replace("đế", "")
-            .replace("de", "")
-            .replace("vỏ", "")
-            .replace("vo", "")
-            .replace("đáy", "")
-            .replace("day", "")
-            .replace("loại", "")
-            .replace("loai", "")
-            .replace("viền", "")
-            .replace("vien", "")
-            .replace("nền", "")
-            .replace("nen", "")
-            .replace("vành", "")
-            .replace("vanh", "")
-        )
 
+def get_quantity_in_number(ordered_quantities: list):
+    return [parse_vietnamese_number(ordered_quantity) for ordered_quantity in ordered_quantities]
+
+
+def get_correct_crust_type(specified_crusts: list):
     crust_names = {"dày", "mỏng"}
     valid_results = []
     errors = []
 
     for specified_crust in specified_crusts:
-        cleaned_crust = filter_crust(specified_crust)
+        cleaned_crust = crust_normalizer.normalize(specified_crust)
         if cleaned_crust not in crust_names:
             errors.append(cleaned_crust)
         else:
@@ -191,37 +308,12 @@ def get_correct_crust_type(specified_crusts: list):
 
 
 def get_correct_topping_name(specified_toppings: list):
-    correct_topping_names = [
-        "phômát",
-        "thịt hun khói",
-        "jăm bông",
-        "gà",
-        "xúc xích Đức",
-        "xúc xích Mỹ",
-        "dứa",
-        "nấm rơm",
-        "ôliu đen",
-        "thịt bò xay",
-        "cá",
-        "tôm",
-        "mực",
-        "ngao",
-        "ớt xanh",
-        "hành tây",
-        "cá thu",
-        "cá cơm",
-        "bắp",
-        "ba chỉ bò nướng",
-        "thanh Cua",
-        "sò điệp",
-    ]
-
     valid_results = []
     errors = []
     for specified_topping in specified_toppings:
         specified_topping = specified_topping.replace("_", " ")
-        best_match = process.extractOne(specified_topping, correct_topping_names, scorer=fuzz.ratio)
-        if best_match[1] < 80:
+        best_match = topping_name_matcher.extract_one(specified_topping)
+        if best_match is None:
             errors.append(specified_topping)
         else:
             valid_results.append(best_match[0])
@@ -0,0 +1,58 @@
+import pytest
+import torch
+from transformers import PhobertTokenizer, RobertaConfig, RobertaModel
+
+PHOBERT_WORDS = ["xem", "menu", "cho", "mình", "pizza", "hải_sản", "size", "l", "giỏ", "hàng", "thêm", "hủy", "đơn"]
+
+
+@pytest.fixture(scope="session")
+def phobert_path(tmp_path_factory):
+    # A two-layer PhoBERT with random weights and a tiny vocabulary, so the intent model runs without the hub. The
+    # hidden size stays at 768 to fit the intent head.
+    path = tmp_path_factory.mktemp("phobert")
+    with open(path / "vocab.txt", "w", encoding="utf-8") as file:
+        file.writelines(f"{word} 1\n" for word in PHOBERT_WORDS)
+    with open(path / "bpe.codes", "w", encoding="utf-8") as file:
+        file.write("#version: 0.2\n")
+    tokenizer = PhobertTokenizer(str(path / "vocab.txt"), str(path / "bpe.codes"))
+    tokenizer.save_pretrained(str(path))
+    config = RobertaConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=768,
+        num_hidden_layers=2,
+        num_attention_heads=12,
+        intermediate_size=32,
+        max_position_embeddings=140,
+        type_vocab_size=1,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+    torch.manual_seed(0)
+    RobertaModel(config).save_pretrained(str(path))
+    return str(path)
+
+
+ORDER_SENTENCES = [
+    ("cho mình 2 pizza hải_sản size l đế dày", ["O", "O", "Quantity", "O", "Pizza", "O", "Size", "O", "Crust"]),
+    ("thêm 1 pizza gà_nướng size m", ["O", "Quantity", "O", "Pizza", "O", "Size"]),
+    ("1 hawaiian thêm ớt_xanh", ["Quantity", "Pizza", "O", "Topping"]),
+    ("3 pizza bò size s đế mỏng thêm phô_mai", ["Quantity", "O", "Pizza", "O", "Size", "O", "Crust", "O", "Topping"]),
+    ("hai pizza hải_sản thêm nấm_rơm", ["Quantity", "O", "Pizza", "O", "Topping"]),
+    ("xem menu", ["O", "O"]),
+]
+
+
+@pytest.fixture(scope="session")
+def order_crf_path(tmp_path_factory):
+    # A small CRF trained on a few order sentences, saved the way the notebooks save the entity models.
+    from joblib import dump
+    from sklearn_crfsuite import CRF
+
+    from models.entities.entities_recognizer import EntitiesRecognizer
+
+    path = tmp_path_factory.mktemp("crf") / "order_entity.h5"
+    recognizer = EntitiesRecognizer.__new__(EntitiesRecognizer)
+    sentences = [text.split() for text, _ in ORDER_SENTENCES]
+    model = CRF(algorithm="lbfgs", c1=0.1, c2=0.1, max_iterations=50)
+    model.fit([recognizer.sentence_features(words) for words in sentences], [labels for _, labels in ORDER_SENTENCES])
+    dump(model, path)
+    return str(path)
@@ -0,0 +1,134 @@
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from aiohttp import web
+
+from models.intents.tokenization import BoundedCache
+from nlu.async_backend_client import AsyncBackendClient, EventLoopBackendClient
+from nlu.chatbot import Chatbot
+
+
+class BackendOnlyChatbot(Chatbot):
+    # Only the session state and the backend client; each turn makes one backend call and remembers the message.
+    def __init__(self, backend_client, backend_url: str = None):
+        self.backend_client = backend_client
+        self.backend_url = backend_url
+        self.turn_executor = ThreadPoolExecutor(max_workers=4)
+        self.pending_information = {
+            "add_to_cart": [],
+            "provide_info": {},
+            "remove_from_cart": [],
+            "modify_cart_item": [],
+        }
+        self.pending_cus_info = False
+        self.pending_confirmation = None
+        self.initial_conversation_state = copy.deepcopy(self.get_conversation_state())
+        self.session_states = BoundedCache(10)
+        self.session_locks = {}
+
+    def handle_message(self, message: str):
+        self.pending_information["add_to_cart"].append(message)
+        if self.backend_url:
+            return self.backend_client.get(self.backend_url + message).json()
+        return list(self.pending_information["add_to_cart"])
+
+
+async def start_server(handler) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_route("*", "/{message}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+def get_server_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}/"
+
+
+def test_backend_calls_of_different_sessions_overlap():
+    async def run():
+        both_arrived = asyncio.Event()
+        arrived = []
+
+        async def handler(request):
+            # Answers only once both sessions are waiting on the backend, which serialized turns never reach.
+            arrived.append(request.match_info["message"])
+            if len(arrived) == 2:
+                both_arrived.set()
+            await asyncio.wait_for(both_arrived.wait(), 5)
+            return web.json_response({"message": request.match_info["message"]})
+
+        runner = await start_server(handler)
+        async_client = AsyncBackendClient(max_retries=0)
+        await async_client.start()
+        chatbot = BackendOnlyChatbot(EventLoopBackendClient(async_client), get_server_url(runner))
+        try:
+            responses = await asyncio.gather(
+                chatbot.handle_message_async("a", "channel-1"), chatbot.handle_message_async("b", "channel-2")
+            )
+        finally:
+            await async_client.close()
+            await runner.cleanup()
+        return chatbot, responses, arrived
+
+    chatbot, responses, arrived = asyncio.run(run())
+
+    assert [response["message"] for response in responses] == ["a", "b"]
+    assert sorted(arrived) == ["a", "b"]
+    assert chatbot.session_states["channel-1"]["pending_information"]["add_to_cart"] == ["a"]
+    assert chatbot.session_states["channel-2"]["pending_information"]["add_to_cart"] == ["b"]
+    assert chatbot.pending_information["add_to_cart"] == []
+    assert chatbot.session_locks == {}
+
+
+def test_turns_of_one_session_run_in_order_on_its_own_state():
+    chatbot = BackendOnlyChatbot(None)
+
+    async def run():
+        return await asyncio.gather(
+            chatbot.handle_message_async("a", "channel-1"),
+            chatbot.handle_message_async("b", "channel-1"),
+            chatbot.handle_message_async("c", "channel-2"),
+            chatbot.handle_message_async("d", "channel-1"),
+        )
+
+    assert asyncio.run(run()) == [["a"], ["a", "b"], ["c"], ["a", "b", "d"]]
+
+
+@pytest.mark.parametrize("method", ["GET", "PUT", "POST"])
+def test_dropped_request_is_only_retried_when_idempotent(method):
+    async def run():
+        received = []
+
+        async def drop_connection(request):
+            received.append(request.method)
+            request.transport.close()
+            return web.Response()
+
+        runner = await start_server(drop_connection)
+        async_client = AsyncBackendClient(max_retries=2, backoff_seconds=0)
+        await async_client.start()
+        backend_client = EventLoopBackendClient(async_client)
+        try:
+            with pytest.raises(requests.ConnectionError):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: backend_client.request(method, get_server_url(runner) + "cart", json={})
+                )
+        finally:
+            await async_client.close()
+            await runner.cleanup()
+        return received
+
+    received = asyncio.run(run())
+
+    assert set(received) == {method}
+    if method == "POST":
+        assert len(received) == 1
+    else:
+        # aiohttp itself also resends an idempotent request once when a kept-alive connection drops.
+        assert len(received) >= 3
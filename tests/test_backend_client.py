@@ -0,0 +1,65 @@
+import socket
+import threading
+
+import pytest
+import requests
+
+from nlu.backend_client import BackendClient
+
+
+class CountingBackendClient(BackendClient):
+    def __init__(self):
+        super().__init__(connect_timeout=1, read_timeout=1, max_retries=2, backoff_seconds=0)
+        self.attempts = 0
+        send = self.session.request
+
+        def count_attempts(*args, **kwargs):
+            self.attempts += 1
+            return send(*args, **kwargs)
+
+        self.session.request = count_attempts
+
+
+def get_closed_port() -> int:
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        return server.getsockname()[1]
+
+
+@pytest.fixture
+def dropping_server_url():
+    # Reads each request and closes the connection without answering, as a backend that crashed mid-request would.
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def serve():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            with connection:
+                connection.recv(65536)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/"
+    server.close()
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_refused_connection_is_retried(method):
+    client = CountingBackendClient()
+
+    with pytest.raises(requests.ConnectionError):
+        client.request(method, f"http://127.0.0.1:{get_closed_port()}/")
+    assert client.attempts == 3
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 3), ("PUT", 3), ("POST", 1)])
+def test_dropped_request_is_only_retried_when_idempotent(dropping_server_url, method, attempts):
+    client = CountingBackendClient()
+
+    with pytest.raises(requests.ConnectionError):
+        client.request(method, dropping_server_url, json={})
+    assert client.attempts == attempts
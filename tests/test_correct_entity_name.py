@@ -0,0 +1,127 @@
+import json
+import os
+import random
+
+import pytest
+from fuzzywuzzy import fuzz, process
+
+from utils.correct_entity_name import (
+    NAME_MATCH_THRESHOLD,
+    NameMatcher,
+    correct_pizza_names,
+    correct_topping_names,
+    crust_normalizer,
+    get_correct_pizza_name,
+    get_correct_topping_name,
+    get_quantity_in_number,
+    parse_vietnamese_number,
+    size_normalizer,
+)
+
+LETTERS = "abcdeghiklmnopqrstuvxyàáâãèéêìíòóôõùúýăđĩũơưạảấầẩậắằẳặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ _-'"
+
+with open(os.path.join(os.path.dirname(__file__), "synonym_corpus.json"), "r", encoding="utf-8") as file:
+    SYNONYM_CORPUS = json.load(file)
+NORMALIZERS = {"size": size_normalizer, "crust": crust_normalizer}
+
+
+def extract_one_with_fuzzywuzzy(query: str, names: list):
+    # What get_correct_pizza_name and get_correct_topping_name did before the index.
+    best_match = process.extractOne(query, names, scorer=fuzz.ratio)
+    if best_match is None or best_match[1] < NAME_MATCH_THRESHOLD:
+        return None
+    return best_match
+
+
+def make_typos(name: str, randomizer: random.Random) -> str:
+    characters = list(name)
+    for _ in range(randomizer.randint(0, 4)):
+        position = randomizer.randint(0, len(characters))
+        operation = randomizer.choice(["insert", "delete", "replace", "upper"])
+        if operation == "insert" or not characters:
+            characters.insert(position, randomizer.choice(LETTERS))
+        elif operation == "delete":
+            del characters[min(position, len(characters) - 1)]
+        elif operation == "replace":
+            characters[min(position, len(characters) - 1)] = randomizer.choice(LETTERS)
+        else:
+            characters = [character.upper() for character in characters]
+    return "".join(characters)
+
+
+def make_queries(names: list, count: int, seed: int) -> list:
+    randomizer = random.Random(seed)
+    queries = ["", " ", "pizza", "thập cẩm", "bò", "cá ngừ", "gà nướng", "HAWAIIAN", "sea food", "tôm!"]
+    queries += [make_typos(randomizer.choice(names), randomizer) for _ in range(count)]
+    queries += [
+        "".join(randomizer.choice(LETTERS) for _ in range(randomizer.randint(1, 12))) for _ in range(count // 4)
+    ]
+    return queries
+
+
+def test_name_matcher_matches_extract_one_on_the_menu():
+    for names in (correct_pizza_names, correct_topping_names):
+        matcher = NameMatcher(names)
+        for query in make_queries(names, 2000, seed=0):
+            assert matcher.extract_one(query) == extract_one_with_fuzzywuzzy(query, names), query
+
+
+def test_name_matcher_matches_extract_one_on_a_large_catalog():
+    randomizer = random.Random(1)
+    words = [name for names in (correct_pizza_names, correct_topping_names) for name in " ".join(names).split()]
+    names = [" ".join(randomizer.sample(words, randomizer.randint(1, 3))) for _ in range(400)]
+    matcher = NameMatcher(names)
+
+    for query in make_queries(names, 500, seed=2):
+        assert matcher.extract_one(query) == extract_one_with_fuzzywuzzy(query, names), query
+
+
+def test_correct_names_keep_their_errors():
+    assert get_correct_pizza_name(["bánh pizza hải_sản", "cái hawaian", "bbq_chiken", "pizza"]) == (
+        ["hawaiian", "bbq chicken"],
+        ["bánh pizza hải_sản", "pizza"],
+    )
+    assert get_correct_topping_name(["phô_mát", "xúc_xích đức", "thịt_bò", "ớt"]) == (
+        ["phômát", "xúc xích Đức"],
+        ["thịt bò", "ớt"],
+    )
+
+
+def test_parse_vietnamese_number():
+    examples = {
+        "2": 2,
+        "12 cái": 12,
+        "không": 0,
+        "một": 1,
+        "mười": 10,
+        "mười lăm": 15,
+        "muoi lam": 15,
+        "hai mươi": 20,
+        "hai mươi mốt": 21,
+        "hai_mươi_tư": 24,
+        "chín mươi chín": 99,
+        "2 chục": 20,
+        "một trăm": 100,
+        "một trăm linh năm": 105,
+        "hai trăm ba mươi tư": 234,
+        "cho mình ba cái": 3,
+        "ba bốn": 3,
+        "10 lăm": 10,
+        "bánh": None,
+        "": None,
+    }
+    assert {text: parse_vietnamese_number(text) for text in examples} == examples
+
+
+def test_parse_vietnamese_number_rejects_repeated_places():
+    for text in ["mười mười", "hai mươi hai mươi", "mười hai mươi", "20 mươi", "15 trăm", "hai trăm ba trăm"]:
+        assert parse_vietnamese_number(text) is None, text
+    assert get_quantity_in_number(["mười mười", "hai", "20 mươi"]) == [None, 2, None]
+
+
+@pytest.mark.parametrize(
+    "kind, text, expected",
+    [(kind, text, expected) for kind, cases in SYNONYM_CORPUS.items() for text, expected in cases.items()],
+)
+def test_synonym_normalizers_match_the_corpus(kind, text, expected):
+    assert NORMALIZERS[kind].normalize(text) == expected
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+from conftest import ORDER_SENTENCES
+from joblib import load
+
+from models.entities.crf_decoder import CompiledCRF, verify_decoder
+from models.entities.entities_recognizer import EntitiesRecognizer
+
+WORDS = ["cho", "mình", "2", "1", "pizza", "hải_sản", "gà_nướng", "size", "l", "m", "đế", "dày", "thêm", "ớt_xanh"]
+WORDS += ["xem", "menu", "Pizza", "HAI", "12", "bánh", "ạ", ".", "?", "chưa_thấy"]
+
+
+def make_sentences(recognizer: EntitiesRecognizer, count: int, seed: int) -> list:
+    randomizer = random.Random(seed)
+    sentences = [[], ["pizza"], ["chưa_thấy"]]
+    sentences += [[randomizer.choice(WORDS) for _ in range(randomizer.randint(1, 20))] for _ in range(count)]
+    return [recognizer.sentence_features(words) for words in sentences]
+
+
+def get_path_score(compiled_model: CompiledCRF, sentence: list, labels: list) -> float:
+    label_ids = [compiled_model.labels.index(label) for label in labels]
+    state_scores = compiled_model.get_state_scores([sentence])
+    score = sum(state_scores[position, label_id] for position, label_id in enumerate(label_ids))
+    return score + sum(compiled_model.transition_weights[a, b] for a, b in zip(label_ids, label_ids[1:]))
+
+
+def test_compiled_crf_matches_crfsuite_on_orders(order_crf_path):
+    model = load(order_crf_path)
+    recognizer = EntitiesRecognizer(order_crf_path, True)
+    texts = [text for text, _ in ORDER_SENTENCES] + ["cho mình 1 pizza bò size m", "thêm 2 hawaiian đế mỏng"]
+    sentences = [recognizer.sentence_features(text.split()) for text in texts]
+
+    compiled_model = CompiledCRF.from_model(model)
+
+    assert compiled_model.predict(sentences) == [model.predict_single(sentence) for sentence in sentences]
+    assert verify_decoder(model, compiled_model, sentences) == []
+
+
+def test_compiled_crf_only_differs_on_tied_paths(order_crf_path):
+    model = load(order_crf_path)
+    recognizer = EntitiesRecognizer(order_crf_path, True)
+    sentences = make_sentences(recognizer, 500, seed=0)
+    compiled_model = CompiledCRF.from_model(model)
+
+    predictions = compiled_model.predict(sentences)
+
+    mismatches = verify_decoder(model, compiled_model, sentences)
+    assert len(mismatches) < len(sentences) // 20
+    for index in mismatches:
+        expected = get_path_score(compiled_model, sentences[index], model.predict_single(sentences[index]))
+        assert np.isclose(get_path_score(compiled_model, sentences[index], predictions[index]), expected)
+    assert predictions[:3] == [[], [model.predict_single(sentences[1])[0]], [model.predict_single(sentences[2])[0]]]
+    assert compiled_model.predict([]) == []
+    assert compiled_model.predict([[], []]) == [[], []]
+
+
+def test_saved_compiled_crf_serves_the_recognizer(order_crf_path, tmp_path):
+    compiled_path = str(tmp_path / "order_entity.npz")
+    CompiledCRF.from_model(load(order_crf_path)).save(compiled_path)
+    recognizer = EntitiesRecognizer(order_crf_path, True)
+    compiled_recognizer = EntitiesRecognizer(compiled_path, True)
+    texts = ["cho mình 2 pizza hải sản size l đế dày", "1 hawaiian thêm ớt xanh", "xem menu", ""]
+
+    assert isinstance(compiled_recognizer.model, CompiledCRF)
+    assert np.array_equal(compiled_recognizer.model.state_weights, CompiledCRF.load(compiled_path).state_weights)
+    assert compiled_recognizer.predict_batch(texts) == recognizer.predict_batch(texts)
+    assert compiled_recognizer.predict_order_with_index_batch(texts) == recognizer.predict_order_with_index_batch(texts)
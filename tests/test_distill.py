@@ -0,0 +1,28 @@
+import torch
+
+from models.intents.distill import build_student_model
+from models.intents.intents_recognizer import IntentsRecognizer
+from models.utils.preprocessing import default_preprocessor
+
+MESSAGES = ["xem menu", "cho mình 1 pizza hải sản size l"]
+
+
+def test_build_student_model_truncates_a_copy_of_the_teacher(phobert_path):
+    teacher = IntentsRecognizer(default_preprocessor, phobert_path).prepare_for_inference()
+    expected = teacher.predict_batch(MESSAGES)
+
+    student = build_student_model(teacher, 1)
+
+    assert len(student.phobert.encoder.layer) == 1
+    assert student.phobert.config.num_hidden_layers == 1
+    assert len(teacher.phobert.encoder.layer) == 2
+    assert teacher.phobert.config.num_hidden_layers == 2
+    assert student.preprocessor is teacher.preprocessor
+    assert student.intent_tokenizer is teacher.intent_tokenizer
+    assert torch.equal(student.linear.weight, teacher.linear.weight)
+
+    with torch.no_grad():
+        student.linear.weight.add_(1)
+    assert len(student.predict_batch(MESSAGES)) == len(MESSAGES)
+    for (_, probabilities), (_, expected_probabilities) in zip(teacher.predict_batch(MESSAGES), expected):
+        assert (probabilities == expected_probabilities).all()
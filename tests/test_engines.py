@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from models.intents import engines
+from models.intents.engines import (
+    ShadowIntentEngine,
+    load_intent_engine,
+    register_intent_engine,
+)
+from models.utils.preprocessing import default_preprocessor
+
+
+class StubEngine:
+    def __init__(self, labels: dict, release: threading.Event = None):
+        self.labels = labels
+        self.release = release
+        self.batches = []
+
+    def predict_batch(self, texts):
+        if self.release is not None:
+            self.release.wait(5)
+        self.batches.append(list(texts))
+        return [(self.labels.get(text), np.ones(1)) for text in texts]
+
+
+@pytest.fixture
+def intent_engine_loaders(monkeypatch):
+    loaders = dict(engines.intent_engine_loaders)
+    monkeypatch.setattr(engines, "intent_engine_loaders", loaders)
+    return loaders
+
+
+def test_unknown_intent_engine_lists_the_registered_names(intent_engine_loaders):
+    with pytest.raises(ValueError, match=r"Unknown intent engine 'tensorrt'.*'onnx'.*'torch'"):
+        load_intent_engine("tensorrt", "model.bin", default_preprocessor)
+
+
+def test_registered_loader_receives_the_engine_arguments(intent_engine_loaders):
+    calls = []
+
+    @register_intent_engine("stub")
+    def load_stub_engine(model_path, preprocessor, num_threads, tokenizer_path, deterministic):
+        calls.append((model_path, preprocessor, num_threads, tokenizer_path, deterministic))
+        return "stub engine"
+
+    engine = load_intent_engine("stub", "model.bin", default_preprocessor, 2, "phobert", True)
+
+    assert engine == "stub engine"
+    assert intent_engine_loaders["stub"] is load_stub_engine
+    assert calls == [("model.bin", default_preprocessor, 2, "phobert", True)]
+
+
+def test_shadow_engine_records_agreement_and_latency(capsys):
+    primary = StubEngine({"xem menu": "view_menu", "hủy đơn": "cancel_order", "y": None})
+    secondary = StubEngine({"xem menu": "view_menu", "hủy đơn": "track_order", "y": None})
+    engine = ShadowIntentEngine(primary, secondary, "torch", "onnx", sample_rate=1, log_interval=0)
+
+    results = engine.predict_batch(["xem menu", "hủy đơn", "y"])
+    engine.executor.shutdown(wait=True)
+
+    assert [label for label, _ in results] == ["view_menu", "cancel_order", None]
+    stats = engine.get_stats()
+    assert stats["compared"] == 3
+    assert stats["agreement_rate"] == pytest.approx(2 / 3)
+    assert stats["skipped"] == 0
+    assert stats["recent_disagreements"] == [("hủy đơn", "cancel_order", "track_order")]
+    assert stats["latency"]["torch"]["samples"] == stats["latency"]["onnx"]["samples"] == 1
+    assert sum(stats["latency"]["onnx"]["buckets_ms"].values()) == 1
+    assert "Shadow intent engine onnx: compared=3, agreement_rate=0.6667, skipped=0" in capsys.readouterr().out
+
+
+def test_shadow_engine_skips_samples_while_a_shadow_run_is_in_flight():
+    release = threading.Event()
+    primary = StubEngine({"xem menu": "view_menu"})
+    secondary = StubEngine({"xem menu": "view_menu"}, release)
+    engine = ShadowIntentEngine(primary, secondary, "torch", "onnx", sample_rate=1)
+
+    for _ in range(5):
+        engine.predict_batch(["xem menu"])
+    release.set()
+    engine.executor.submit(lambda: None).result(5)
+    engine.predict_batch(["xem menu"])
+    engine.executor.shutdown(wait=True)
+
+    assert secondary.batches == [["xem menu"], ["xem menu"]]
+    assert engine.get_stats()["compared"] == 2
+    assert engine.get_stats()["skipped"] == 4
@@ -0,0 +1,131 @@
+import random
+
+from models.entities.crf_decoder import get_item_attributes
+from models.entities.entities_recognizer import (
+    EntitiesRecognizer,
+    EntityResult,
+)
+from nlu import chatbot as chatbot_module
+from nlu.chatbot import Chatbot
+
+WORDS = ["pizza", "Pizza", "PIZZA", "hải_sản", "Hải_Sản", "2", "12", "1l", "l", "M", "đế", "ạ", "", ".", "?", "x2"]
+WORDS += ["ớt_xanh", "ÔNG", "thêm", "size", "Size", "1000", "½", "²", "a'b"]
+
+
+def legacy_sentence_features(recognizer: EntitiesRecognizer, words: list) -> list:
+    return [recognizer.word2features(words, i) for i in range(len(words))]
+
+
+def test_sentence_features_match_word2features():
+    recognizer = EntitiesRecognizer.__new__(EntitiesRecognizer)
+    randomizer = random.Random(0)
+    sentences = [[], ["pizza"], ["PIZZA", "2"], WORDS]
+    sentences += [[randomizer.choice(WORDS) for _ in range(randomizer.randint(1, 12))] for _ in range(300)]
+
+    for words in sentences:
+        expected = legacy_sentence_features(recognizer, words)
+        features = recognizer.sentence_features(words)
+        assert features == expected
+        assert [list(item.items()) for item in features] == [list(item.items()) for item in expected]
+        assert [list(get_item_attributes(item)) for item in features] == [
+            list(get_item_attributes(item)) for item in expected
+        ]
+
+
+def test_sentence_features_are_not_shared_between_calls():
+    recognizer = EntitiesRecognizer.__new__(EntitiesRecognizer)
+    features = recognizer.sentence_features(["pizza", "pizza"])
+    features[0]["word.lower()"] = "changed"
+
+    assert recognizer.sentence_features(["pizza", "pizza"]) == legacy_sentence_features(recognizer, ["pizza", "pizza"])
+
+
+class CountingRecognizer(EntitiesRecognizer):
+    def __init__(self):
+        self.calls = []
+
+    def reformat_order_result(self, predicted_result):
+        self.calls.append("grouped")
+        return super().reformat_order_result(predicted_result)
+
+    def reformat_order_result_with_index(self, predicted_result):
+        self.calls.append("indexed")
+        return super().reformat_order_result_with_index(predicted_result)
+
+
+ORDER_WORDS = ["cho", "2", "pizza", "hawaian", "size", "l", "và", "1", "bbq_chiken", "thêm", "phô_mát"]
+ORDER_LABELS = ["O", "Quantity", "O", "Pizza", "O", "Size", "O", "Quantity", "Pizza", "O", "Topping"]
+
+
+def test_entity_result_builds_each_view_once_and_returns_copies():
+    recognizer = CountingRecognizer()
+    result = EntityResult(ORDER_WORDS, ORDER_LABELS, recognizer)
+    assert recognizer.calls == []
+
+    grouped = result.get_grouped()
+    grouped["Pizza"].append("seafood")
+    grouped["Size"] = []
+    indexed = result.get_indexed()
+    indexed["Pizza"].clear()
+
+    assert result.get_grouped() == {
+        "Quantity": ["2", "1"],
+        "Pizza": ["hawaian", "bbq_chiken"],
+        "Size": ["l"],
+        "Topping": ["phô_mát"],
+    }
+    assert result.get_indexed()["Pizza"] == [("hawaian", 3), ("bbq_chiken", 8)]
+    assert recognizer.calls == ["grouped", "indexed"]
+
+
+def test_entity_result_views_match_the_recognizer(order_crf_path):
+    recognizer = EntitiesRecognizer(order_crf_path, True)
+    texts = ["cho mình 2 pizza hải sản size l đế dày", "1 hawaiian thêm ớt xanh", "xem menu", ""]
+
+    results = recognizer.predict_result_batch(texts)
+
+    assert [result.get_grouped() for result in results] == recognizer.predict_batch(texts)
+    assert [result.get_indexed() for result in results] == recognizer.predict_order_with_index_batch(texts)
+
+
+def test_entity_result_corrects_each_label_once():
+    result = EntityResult(ORDER_WORDS, ORDER_LABELS, CountingRecognizer())
+    calls = []
+
+    def correct(words):
+        calls.append(list(words))
+        return [word.upper() for word in words], []
+
+    assert result.get_corrected("Pizza", correct) == (["HAWAIAN", "BBQ_CHIKEN"], [])
+    assert result.get_corrected("Pizza", correct) == (["HAWAIAN", "BBQ_CHIKEN"], [])
+    assert result.get_corrected("Topping", correct) == (["PHÔ_MÁT"], [])
+    assert calls == [["hawaian", "bbq_chiken"], ["phô_mát"]]
+
+
+def test_chatbot_corrects_both_views_once_per_entity_result(monkeypatch):
+    calls = []
+    correct_pizza_name = chatbot_module.get_correct_pizza_name
+
+    def counting_correct_pizza_name(words):
+        calls.append(list(words))
+        return correct_pizza_name(words)
+
+    monkeypatch.setattr(chatbot_module, "get_correct_pizza_name", counting_correct_pizza_name)
+    chatbot = Chatbot.__new__(Chatbot)
+    result = EntityResult(ORDER_WORDS, ORDER_LABELS, CountingRecognizer())
+    check_field = ["Pizza", "Size", "Crust", "Topping"]
+
+    grouped = chatbot.verify_product_info(result.get_grouped(), check_field, result)
+    indexed = chatbot.verify_product_info_with_index(result.get_indexed(), check_field, result)
+    grouped["Pizza"].append("seafood")
+
+    assert calls == [["hawaian", "bbq_chiken"]]
+    assert chatbot.verify_product_info(result.get_grouped(), check_field, result) == {
+        "Quantity": [2, 1],
+        "Pizza": ["hawaiian", "bbq chicken"],
+        "Size": ["l"],
+        "Topping": ["phômát"],
+    }
+    assert grouped["Pizza"] == ["hawaiian", "bbq chicken", "seafood"]
+    assert indexed == chatbot.verify_product_info_with_index(result.get_indexed(), check_field)
+    assert indexed["Pizza"] == [("hawaiian", 3), ("bbq chicken", 8)]
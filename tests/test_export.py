@@ -0,0 +1,37 @@
+import pytest
+
+from models.intents import export_onnx, export_torchscript
+from models.intents.engines import load_intent_engine
+from models.intents.intents_recognizer import IntentsRecognizer
+from models.utils.preprocessing import default_preprocessor
+
+MESSAGES = ["xem menu", "cho mình 1 pizza hải sản size l", "hủy đơn", "thêm giỏ hàng", "y"]
+
+
+@pytest.fixture(scope="module")
+def intent_model(phobert_path):
+    return IntentsRecognizer(default_preprocessor, phobert_path).prepare_for_inference()
+
+
+def test_torchscript_export_matches_the_pytorch_model(intent_model, phobert_path, tmp_path):
+    torchscript_path = str(tmp_path / "intents.pt")
+    export_torchscript.export_intent_model(intent_model, torchscript_path)
+
+    engine = load_intent_engine("torchscript", torchscript_path, default_preprocessor, tokenizer_path=phobert_path)
+
+    assert engine.intent_tokenizer.pretrained_path == phobert_path
+    report = export_onnx.verify_parity(intent_model, engine, MESSAGES, tolerance=1e-4)
+    assert report["passed"], report
+    assert engine.predict(MESSAGES[0]) == intent_model.predict(MESSAGES[0])
+
+
+def test_onnx_export_matches_the_pytorch_model(intent_model, phobert_path, tmp_path):
+    pytest.importorskip("onnxruntime")
+    onnx_path = str(tmp_path / "intents.onnx")
+    export_onnx.export_intent_model(intent_model, onnx_path)
+
+    engine = load_intent_engine("onnx", onnx_path, default_preprocessor, tokenizer_path=phobert_path)
+
+    assert engine.intent_tokenizer.pretrained_path == phobert_path
+    report = export_onnx.verify_parity(intent_model, engine, MESSAGES, tolerance=1e-4)
+    assert report["passed"], report
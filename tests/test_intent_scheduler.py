@@ -0,0 +1,129 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from models.intents.tokenization import BoundedCache
+from nlu.chatbot import Chatbot
+from nlu.intent_scheduler import IntentBatchScheduler
+from nlu.result_cache import MISSING, NLUResultCache
+
+
+class RecordingPredictor:
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, messages: list) -> list:
+        self.batches.append(list(messages))
+        if self.error is not None:
+            raise self.error
+        return [(f"intent:{message}", 1.0) for message in messages]
+
+
+async def predict_all(scheduler: IntentBatchScheduler, messages: list) -> list:
+    try:
+        return await asyncio.gather(*(scheduler.predict(message) for message in messages), return_exceptions=True)
+    finally:
+        await scheduler.stop()
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_window():
+    predictor = RecordingPredictor()
+    scheduler = IntentBatchScheduler(predictor, max_batch_size=3, max_wait_ms=10_000)
+
+    started = time.monotonic()
+    results = asyncio.run(predict_all(scheduler, ["a", "b", "c"]))
+
+    assert time.monotonic() - started < 5
+    assert results == ["intent:a", "intent:b", "intent:c"]
+    assert predictor.batches == [["a", "b", "c"]]
+
+
+def test_partial_batch_is_flushed_when_the_window_ends():
+    predictor = RecordingPredictor()
+    scheduler = IntentBatchScheduler(predictor, max_batch_size=16, max_wait_ms=50)
+
+    started = time.monotonic()
+    results = asyncio.run(predict_all(scheduler, ["a", "b"]))
+
+    assert time.monotonic() - started >= 0.05
+    assert results == ["intent:a", "intent:b"]
+    assert predictor.batches == [["a", "b"]]
+
+
+def test_batch_error_reaches_every_caller_and_the_scheduler_keeps_running():
+    async def run():
+        predictor = RecordingPredictor(ValueError("model failed"))
+        scheduler = IntentBatchScheduler(predictor, max_batch_size=2, max_wait_ms=10)
+        try:
+            failed = await asyncio.gather(scheduler.predict("a"), scheduler.predict("b"), return_exceptions=True)
+            predictor.error = None
+            return failed, await scheduler.predict("c")
+        finally:
+            await scheduler.stop()
+
+    failed, result = asyncio.run(run())
+
+    assert [type(error) for error in failed] == [ValueError, ValueError]
+    assert result == "intent:c"
+
+
+class IntentOnlyChatbot(Chatbot):
+    # Only the state prefetch_intent reads; no models are loaded.
+    def __init__(self):
+        self.turn_executor = ThreadPoolExecutor(max_workers=1)
+        self.result_cache = NLUResultCache([])
+        self.pending_information = {
+            "add_to_cart": [],
+            "provide_info": {},
+            "remove_from_cart": [],
+            "modify_cart_item": [],
+        }
+        self.pending_cus_info = False
+        self.pending_confirmation = None
+        self.initial_conversation_state = self.get_conversation_state()
+        self.session_states = BoundedCache(10)
+        self.session_locks = {}
+
+
+async def prefetch(chatbot: Chatbot, scheduler: IntentBatchScheduler, messages: list, session_key: str = ""):
+    try:
+        for message in messages:
+            await chatbot.prefetch_intent(message, scheduler, session_key)
+    finally:
+        await scheduler.stop()
+
+
+def test_prefetch_fills_the_cache_without_counting_hits_or_misses():
+    chatbot = IntentOnlyChatbot()
+    predictor = RecordingPredictor()
+
+    asyncio.run(prefetch(chatbot, IntentBatchScheduler(predictor, max_wait_ms=1), ["Xem menu", "xem MENU"]))
+
+    assert predictor.batches == [["Xem menu"]]
+    assert chatbot.result_cache.peek("intent", "xem menu") == "intent:Xem menu"
+    assert chatbot.result_cache.get_stats()["hits"] == chatbot.result_cache.get_stats()["misses"] == 0
+
+
+def test_prefetch_is_skipped_while_waiting_for_an_answer():
+    chatbot = IntentOnlyChatbot()
+    waiting_chatbot = chatbot.get_session_chatbot("channel-1")
+    waiting_chatbot.pending_confirmation = "confirm_order"
+    chatbot.session_states["channel-1"] = waiting_chatbot.get_conversation_state()
+    predictor = RecordingPredictor()
+
+    asyncio.run(prefetch(chatbot, IntentBatchScheduler(predictor, max_wait_ms=1), ["y"], "channel-1"))
+    asyncio.run(prefetch(chatbot, IntentBatchScheduler(predictor, max_wait_ms=1), ["y"], "channel-2"))
+
+    assert predictor.batches == [["y"]]
+    assert chatbot.pending_confirmation is None
+
+
+def test_failed_prefetch_leaves_the_message_to_handle_message(capsys):
+    chatbot = IntentOnlyChatbot()
+    predictor = RecordingPredictor(RuntimeError("model failed"))
+
+    asyncio.run(prefetch(chatbot, IntentBatchScheduler(predictor, max_wait_ms=1), ["xem menu"]))
+
+    assert chatbot.result_cache.peek("intent", "xem menu") is MISSING
+    assert "model failed" in capsys.readouterr().out
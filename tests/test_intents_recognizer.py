@@ -0,0 +1,54 @@
+import numpy as np
+import torch
+
+from models.intents.engines import load_intent_engine
+from models.intents.intents_recognizer import (
+    INTENT_HEAD_FILE,
+    IntentsRecognizer,
+)
+from models.utils.preprocessing import default_preprocessor
+
+MESSAGES = ["xem menu", "cho mình 1 pizza hải sản size l", "hủy đơn", "thêm giỏ hàng"]
+
+
+def test_artifact_round_trip_reproduces_the_predictions(phobert_path, tmp_path):
+    model = IntentsRecognizer(default_preprocessor, phobert_path).eval()
+    artifact_path = str(tmp_path / "intents_artifact")
+
+    model.save_artifact(artifact_path)
+    packaged_model = IntentsRecognizer.from_artifact(artifact_path).eval()
+    engine = load_intent_engine("torch", artifact_path, default_preprocessor)
+
+    assert (tmp_path / "intents_artifact" / INTENT_HEAD_FILE).exists()
+    assert packaged_model.intent_tokenizer.pretrained_path == artifact_path
+    expected = model.predict_batch(MESSAGES)
+    for reloaded in (packaged_model, engine):
+        for (label, probabilities), (expected_label, expected_probabilities) in zip(
+            reloaded.predict_batch(MESSAGES), expected
+        ):
+            assert label == expected_label
+            np.testing.assert_allclose(probabilities, expected_probabilities, atol=1e-6)
+
+
+def test_prepare_for_inference_freezes_the_model_in_eval_mode(phobert_path):
+    model = IntentsRecognizer(default_preprocessor, phobert_path).train()
+
+    assert model.prepare_for_inference() is model
+
+    assert not model.training
+    assert not any(module.training for module in model.modules())
+    assert not any(parameter.requires_grad for parameter in model.parameters())
+    assert not torch.are_deterministic_algorithms_enabled()
+    first, second = model.predict_batch(MESSAGES), model.predict_batch(MESSAGES)
+    for (label, probabilities), (repeated_label, repeated_probabilities) in zip(first, second):
+        assert label == repeated_label
+        assert np.array_equal(probabilities, repeated_probabilities)
+
+
+def test_deterministic_algorithms_are_opt_in(phobert_path):
+    model = IntentsRecognizer(default_preprocessor, phobert_path)
+    try:
+        model.prepare_for_inference(deterministic=True)
+        assert torch.are_deterministic_algorithms_enabled()
+    finally:
+        torch.use_deterministic_algorithms(False)
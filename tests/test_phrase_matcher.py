@@ -0,0 +1,65 @@
+import random
+
+import pytest
+from legacy_preprocessing import replace_tokens as replace_tokens_with_regex
+
+from models.utils.phrase_matcher import PhraseReplacer
+from models.utils.preprocessing import (
+    read_acronym_dictionary,
+    read_tokenize_dictionary,
+    remove_diacritic,
+    replace_tokens,
+)
+
+
+def make_texts(replacement_dictionary: dict, count: int, seed: int) -> list:
+    randomizer = random.Random(seed)
+    originals = list(replacement_dictionary)
+    tokens = list(replacement_dictionary.values())
+    words = [word for original in originals for word in original.split()]
+    pool = originals + tokens + words + [remove_diacritic(original) for original in originals]
+    pool += ["pizza", "cho", "mình", "2", "12/3", ",", ".", "!", "_", "-", "đ", "tp.", "ko"]
+    texts = []
+    for _ in range(count):
+        parts = [randomizer.choice(pool) for _ in range(randomizer.randint(1, 12))]
+        separators = [randomizer.choice([" ", " ", " ", "", ", ", ".", "_", "-"]) for _ in parts]
+        text = "".join(part + separator for part, separator in zip(parts, separators))
+        texts.append(text.upper() if randomizer.random() < 0.2 else text)
+    return texts
+
+
+@pytest.mark.parametrize("read_dictionary", [read_tokenize_dictionary, read_acronym_dictionary])
+def test_replace_matches_regex_loop_on_shipped_dictionaries(read_dictionary):
+    dictionary = read_dictionary()
+    replacer = PhraseReplacer(dictionary)
+    for text in make_texts(dictionary, 2000, seed=0):
+        assert replace_tokens(text, replacer) == replace_tokens_with_regex(text, dictionary), text
+
+
+def test_replace_matches_regex_loop_on_interacting_phrases():
+    randomizer = random.Random(0)
+    alphabet = "ab_ .Àà-"
+    for _ in range(3000):
+        dictionary = {
+            "".join(randomizer.choice(alphabet) for _ in range(randomizer.randint(1, 4))): "".join(
+                randomizer.choice(alphabet) for _ in range(randomizer.randint(0, 5))
+            )
+            for _ in range(randomizer.randint(1, 6))
+        }
+        replacer = PhraseReplacer(dictionary)
+        for _ in range(5):
+            text = "".join(randomizer.choice(alphabet + "AB") for _ in range(randomizer.randint(0, 14)))
+            assert replacer.replace(text) == replace_tokens_with_regex(text, dictionary), (dictionary, text)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Pizza GA NUONG o HCM", "Pizza gà nướng o hồ chí minh"),
+        ("ga, ga nuong", "gà, gà nướng"),
+        ("pizza_ga gaga", "pizza_ga gaga"),
+    ],
+)
+def test_replace_examples(text, expected):
+    dictionary = {"ga": "gà", "ga nuong": "gà nướng", "hcm": "hồ chí minh"}
+    assert PhraseReplacer(dictionary).replace(text) == expected
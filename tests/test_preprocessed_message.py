@@ -0,0 +1,49 @@
+import legacy_preprocessing
+import pytest
+from test_preprocessing import MESSAGES
+
+from models.utils.preprocessing import (
+    Preprocessor,
+    read_acronym_dictionary,
+    read_stop_word_dictionary,
+    read_tokenize_dictionary,
+)
+
+
+class CountingPreprocessor(Preprocessor):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def normalize(self, text: str) -> str:
+        self.calls.append("normalize")
+        return super().normalize(text)
+
+    def tokenize_entities(self, normalized_text: str) -> str:
+        self.calls.append("tokenize_entities")
+        return super().tokenize_entities(normalized_text)
+
+
+@pytest.fixture(scope="module")
+def dictionaries():
+    return read_tokenize_dictionary(), read_stop_word_dictionary(), read_acronym_dictionary()
+
+
+def test_forms_match_former_preprocessing(dictionaries):
+    preprocessor = Preprocessor()
+    for message in MESSAGES:
+        prepared = preprocessor.prepare(message)
+        intent_text = legacy_preprocessing.preprocessing(message, False, *dictionaries)
+        # The intent form used to be preprocessed a second time inside the recognizer, which changed nothing.
+        assert legacy_preprocessing.preprocessing(intent_text, False, *dictionaries) == intent_text
+        assert prepared.intent_text == intent_text, message
+        assert prepared.entity_text == legacy_preprocessing.preprocessing(message, True, *dictionaries), message
+
+
+def test_forms_are_computed_once():
+    preprocessor = CountingPreprocessor()
+    prepared = preprocessor.prepare("cho mình 2 pizza hải sản size l")
+    for _ in range(3):
+        prepared.intent_text
+        prepared.entity_text
+    assert preprocessor.calls == ["normalize", "tokenize_entities"]
@@ -0,0 +1,77 @@
+import random
+
+import legacy_preprocessing
+import pytest
+
+from models.utils.preprocessing import (
+    Preprocessor,
+    preprocessing,
+    read_acronym_dictionary,
+    read_stop_word_dictionary,
+    read_tokenize_dictionary,
+)
+
+MESSAGES = [
+    "size vừa vừa đủ cho mình.",
+    "cho tôi cái pizza meat lovers size nhỏ",
+    "đơn hàng đã giao chưa?",
+    "ten của mình là nam, số điện thoại la 0987654321",
+    "kiem tra giỏ hang xem đa đay đu chưa",
+    "xem thử menu có pizza bbq chicken không nhỉ?",
+    "thay đổi địa chỉ giao hàng: 456 đường xyz, quận abc",
+    "thêm phô mai và cá vào pizza của tôi, xin vui lòng.",
+    "cho mình loại bo một pizza khỏi giỏ hàng",
+    "em tên là nam, so đien thoai là 0987654321",
+    "theo doi đon hàng của tôi nhanh lên",
+    "lại order thêm pizza meat lovers nữa, size m cũng được",
+    "em ơi, đặt giúp mình một pizza tropicana seafood không hành tây.",
+    "ban kiem tra lai gio hang cua minh giúp minh đuoc không?",
+    "bánh crust dày cho pizza hawaiian ạ.",
+    "xác nhận đơn hang với pizza margherita và thêm nấm rom",
+    "xac nhận đat hang với đia chỉ 123 đuong hoa va số đien thoai 0123456789",
+    "xác nhận địa chi giao hang la 123 đường abc, thành phố. hồ chí minh",
+    "Giao tới 12/3 Lê Lợi, P. Bến Nghé, Q.1, TP.HCM nhé",
+    "2 PIZZA HẢI SẢN ĐẾ MỎNG SIZE L, 1 coca",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def dictionaries():
+    return read_tokenize_dictionary(), read_stop_word_dictionary(), read_acronym_dictionary()
+
+
+def make_messages(dictionaries, count: int, seed: int) -> list:
+    randomizer = random.Random(seed)
+    tokenize_dictionary, stopwords_dictionary, acronym_dictionary = dictionaries
+    pool = list(tokenize_dictionary) + list(acronym_dictionary) + sorted(stopwords_dictionary)
+    pool += [word for message in MESSAGES for word in message.split()]
+    return [
+        " ".join(randomizer.choice(pool) for _ in range(randomizer.randint(1, 15)))
+        + randomizer.choice(["", ".", "?", " nhé!"])
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("is_process_entity", [False, True])
+def test_process_matches_former_preprocessing(dictionaries, is_process_entity):
+    preprocessor = Preprocessor()
+    for message in MESSAGES + make_messages(dictionaries, 300, seed=is_process_entity):
+        expected = legacy_preprocessing.preprocessing(message, is_process_entity, *dictionaries)
+        assert preprocessor.process(message, is_process_entity) == expected, message
+        assert preprocessing(message, is_process_entity) == expected, message
+
+
+@pytest.mark.parametrize("is_process_entity", [False, True])
+def test_process_batch_matches_process(is_process_entity):
+    preprocessor = Preprocessor()
+    assert preprocessor.process_batch(MESSAGES, is_process_entity) == [
+        preprocessor.process(message, is_process_entity) for message in MESSAGES
+    ]
+
+
+def test_dictionaries_are_loaded_on_first_use(tmp_path):
+    preprocessor = Preprocessor(tokenize_dictionary_path=str(tmp_path / "missing.json"))
+    assert preprocessor.process("Pizza") == "pizza"
+    with pytest.raises(FileNotFoundError):
+        preprocessor.process("Pizza", True)
@@ -0,0 +1,50 @@
+import torch
+import torch.nn as nn
+
+from models.intents.engines import load_intent_engine
+from models.intents.intents_recognizer import (
+    IntentsRecognizer,
+    quantize_intent_model,
+)
+from models.utils.preprocessing import default_preprocessor
+
+MESSAGES = ["xem menu", "cho mình 1 pizza hải sản size l", "hủy đơn"]
+
+
+def test_quantize_intent_model_keeps_the_original_model(phobert_path):
+    model = IntentsRecognizer(default_preprocessor, phobert_path).prepare_for_inference()
+    expected = model.predict_batch(MESSAGES)
+
+    quantized_model = quantize_intent_model(model).eval()
+
+    assert isinstance(model.linear, nn.Linear)
+    assert model.phobert.encoder.layer[0].intermediate.dense.weight.dtype == torch.float32
+    assert type(quantized_model.linear) is not nn.Linear
+    assert quantized_model.preprocessor is model.preprocessor
+    assert quantized_model.intent_tokenizer is model.intent_tokenizer
+    for (label, probabilities), (_, expected_probabilities) in zip(quantized_model.predict_batch(MESSAGES), expected):
+        assert label is None or label in model.intent_labels
+        assert probabilities.shape == expected_probabilities.shape
+    for (_, probabilities), (_, expected_probabilities) in zip(model.predict_batch(MESSAGES), expected):
+        assert (probabilities == expected_probabilities).all()
+
+
+def test_quantized_engine_loads_a_saved_quantized_model(phobert_path, tmp_path, monkeypatch):
+    model = IntentsRecognizer(default_preprocessor, phobert_path)
+    quantized_model = quantize_intent_model(model).eval()
+    model_path = str(tmp_path / "intents_int8.bin")
+    torch.save(quantized_model.state_dict(), model_path)
+
+    original_init = IntentsRecognizer.__init__
+    monkeypatch.setattr(
+        IntentsRecognizer,
+        "__init__",
+        lambda self, preprocessor=default_preprocessor: original_init(self, preprocessor, phobert_path),
+    )
+    engine = load_intent_engine("quantized", model_path, default_preprocessor)
+
+    for (label, probabilities), (expected_label, expected_probabilities) in zip(
+        engine.predict_batch(MESSAGES), quantized_model.predict_batch(MESSAGES)
+    ):
+        assert label == expected_label
+        assert torch.allclose(torch.from_numpy(probabilities), torch.from_numpy(expected_probabilities))
@@ -0,0 +1,73 @@
+import os
+
+from nlu.result_cache import MISSING, NLUResultCache
+
+
+def touch(path, content: str, mtime_ns: int):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hit_miss_and_lowercased_key():
+    cache = NLUResultCache([])
+    assert cache.get("intent", "Xem Menu") is MISSING
+    cache.put("intent", "Xem Menu", "view_menu")
+    assert cache.get("intent", "xem menu") == "view_menu"
+    assert cache.get("order_entities", "xem menu") is MISSING
+    assert cache.get_stats() == {
+        "hits": 1,
+        "misses": 2,
+        "evictions": 0,
+        "expirations": 0,
+        "invalidations": 0,
+        "size": 1,
+    }
+
+
+def test_changed_file_inside_artifact_directory_invalidates(tmp_path):
+    artifact_dir = tmp_path / "intent_model"
+    (artifact_dir / "weights").mkdir(parents=True)
+    touch(artifact_dir / "manifest.json", "{}", 1_000_000_000)
+    touch(artifact_dir / "weights" / "model.bin", "v1", 1_000_000_000)
+    directory_mtime = os.stat(artifact_dir).st_mtime_ns
+    cache = NLUResultCache([str(artifact_dir)], artifact_check_interval=0)
+    cache.put("intent", "xem menu", "view_menu")
+
+    touch(artifact_dir / "weights" / "model.bin", "v2", 2_000_000_000)
+    assert os.stat(artifact_dir).st_mtime_ns == directory_mtime
+    assert cache.get("intent", "xem menu") is MISSING
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_unchanged_artifacts_keep_entries(tmp_path):
+    artifact = tmp_path / "order_entity.h5"
+    touch(artifact, "crf", 1_000_000_000)
+    cache = NLUResultCache([str(artifact), str(tmp_path / "missing.bin")], artifact_check_interval=0)
+    cache.put("intent", "xem menu", "view_menu")
+    assert cache.get("intent", "xem menu") == "view_menu"
+    assert cache.get_stats()["invalidations"] == 0
+
+
+def test_peek_does_not_touch_stats_or_order():
+    cache = NLUResultCache([], max_size=2)
+    assert cache.peek("intent", "xem menu") is MISSING
+    cache.put("intent", "xem menu", "view_menu")
+    cache.put("intent", "xem giỏ hàng", "view_cart")
+    assert cache.peek("intent", "XEM MENU") == "view_menu"
+    cache.put("intent", "hủy đơn", "cancel_order")
+    assert cache.peek("intent", "xem menu") is MISSING
+    assert cache.get_stats() == {
+        "hits": 0,
+        "misses": 0,
+        "evictions": 1,
+        "expirations": 0,
+        "invalidations": 0,
+        "size": 2,
+    }
+
+
+def test_peek_ignores_expired_entries():
+    cache = NLUResultCache([], ttl_seconds=-1)
+    cache.put("intent", "xem menu", "view_menu")
+    assert cache.peek("intent", "xem menu") is MISSING
+    assert cache.get_stats()["expirations"] == 0
@@ -0,0 +1,52 @@
+import random
+
+import legacy_preprocessing
+import pytest
+from test_preprocessing import MESSAGES
+
+from models.utils.phrase_matcher import StopwordRemover
+from models.utils.preprocessing import (
+    read_stop_word_dictionary,
+    remove_stopwords,
+)
+
+
+@pytest.fixture(scope="module")
+def stopwords_dictionary():
+    return read_stop_word_dictionary()
+
+
+def make_texts(stopwords_dictionary: set, count: int, seed: int) -> list:
+    randomizer = random.Random(seed)
+    pool = sorted(stopwords_dictionary) + [word for message in MESSAGES for word in message.split()]
+    pool += ["pizza_hải_sản", "2", "size", "đế_mỏng"]
+    separators = [" ", " ", " ", "  ", ", ", ".", "?", "_", "-", "\n"]
+    return [
+        "".join(randomizer.choice(pool) + randomizer.choice(separators) for _ in range(randomizer.randint(1, 12)))
+        for _ in range(count)
+    ]
+
+
+def test_remove_stopwords_matches_former_regex(stopwords_dictionary):
+    stopword_remover = StopwordRemover(stopwords_dictionary)
+    for text in MESSAGES + make_texts(stopwords_dictionary, 2000, seed=0):
+        expected = legacy_preprocessing.remove_stopwords(text, stopwords_dictionary)
+        assert remove_stopwords(text, stopword_remover) == expected, text
+
+
+@pytest.mark.parametrize(
+    "stopwords_dictionary",
+    [
+        {"a", "a b", "b c d", "d?", "không?", ""},
+        {"x", "x y", "y", "-", "y-"},
+        {"ab", "a b", "b"},
+    ],
+)
+def test_remove_stopwords_matches_former_regex_on_small_lists(stopwords_dictionary):
+    randomizer = random.Random(0)
+    stopword_remover = StopwordRemover(stopwords_dictionary)
+    alphabet = "abcdxy -?_.k"
+    for _ in range(3000):
+        text = "".join(randomizer.choice(alphabet) for _ in range(randomizer.randint(0, 16)))
+        expected = legacy_preprocessing.remove_stopwords(text, stopwords_dictionary)
+        assert remove_stopwords(text, stopword_remover) == expected, text
@@ -0,0 +1,103 @@
+import copy
+import pickle
+import random
+
+import numpy as np
+import pytest
+from conftest import PHOBERT_WORDS
+
+from models.intents import tokenization
+from models.intents.intents_recognizer import MAX_LEN, encode_intent_texts
+from models.intents.tokenization import BoundedCache, IntentTokenizer
+
+
+@pytest.mark.parametrize(
+    "copy_cache",
+    [copy.copy, copy.deepcopy, lambda cache: pickle.loads(pickle.dumps(cache))],
+)
+def test_bounded_cache_copies_keep_entries_and_bound(copy_cache):
+    cache = BoundedCache(3)
+    for word in ["xem", "menu", "pizza"]:
+        cache[word] = [len(word)]
+    cache["xem"]
+
+    copied_cache = copy_cache(cache)
+
+    assert list(copied_cache.items()) == [("menu", [4]), ("pizza", [5]), ("xem", [3])]
+    assert copied_cache.max_size == 3
+    assert copied_cache._lock is not cache._lock
+    copied_cache["giỏ"] = [3]
+    assert list(copied_cache) == ["pizza", "xem", "giỏ"]
+    assert list(cache) == ["menu", "pizza", "xem"]
+
+
+def test_intent_tokenizer_can_be_deep_copied(phobert_path):
+    tokenizer = IntentTokenizer(phobert_path, cache_size=10)
+    expected = tokenizer(["xem menu", "cho mình pizza"], max_length=16)
+
+    copied_tokenizer = copy.deepcopy(tokenizer)
+
+    assert copied_tokenizer.word_ids is not tokenizer.word_ids
+    assert copied_tokenizer.word_ids.max_size == 10
+    encoded = copied_tokenizer(["xem menu", "cho mình pizza"], max_length=16)
+    assert all((encoded[key] == expected[key]).all() for key in expected)
+
+
+def make_texts(tokenizer: IntentTokenizer, count: int, seed: int) -> list:
+    randomizer = random.Random(seed)
+    words = PHOBERT_WORDS + ["Pizza", "XEM", "bbq", "123", "đế", "!", "?", "giỏ_hàng", "x"]
+    words += tokenizer.special_tokens + ["<s>xem", "menu</s>", "<unk>", "<mask>"]
+    separators = [" ", " ", " ", "  ", "\n", " \n "]
+    texts = ["", " ", "xem menu", " ".join(["pizza"] * 200)]
+    for _ in range(count):
+        text_words = [randomizer.choice(words) for _ in range(randomizer.randint(1, 30))]
+        texts.append(
+            "".join(word + randomizer.choice(separators) for word in text_words).strip(randomizer.choice("  "))
+        )
+    return texts
+
+
+def test_intent_tokenizer_matches_the_slow_tokenizer(phobert_path):
+    tokenizer = IntentTokenizer(phobert_path, cache_size=50)
+    slow_tokenizer = tokenizer.slow_tokenizer
+    texts = make_texts(tokenizer, 2000, seed=0)
+
+    for text in texts:
+        assert tokenizer.encode(text, MAX_LEN) == slow_tokenizer.encode(text, max_length=MAX_LEN, truncation=True), text
+
+    for start in range(0, len(texts), 64):
+        batch = texts[start : start + 64]
+        encoded = encode_intent_texts(tokenizer, batch, return_tensors="np")
+        expected = encode_intent_texts(slow_tokenizer, batch, return_tensors="np")
+        for key in ["input_ids", "attention_mask", "token_type_ids"]:
+            np.testing.assert_array_equal(encoded[key], expected[key])
+
+
+class FakeFastTokenizer:
+    is_fast = True
+
+    def __init__(self, slow_tokenizer, extra_ids: list):
+        self.slow_tokenizer = slow_tokenizer
+        self.extra_ids = extra_ids
+
+    def encode(self, text: str) -> list:
+        return self.slow_tokenizer.encode(text) + self.extra_ids
+
+
+@pytest.mark.parametrize("extra_ids, enabled", [([], True), ([5], False)])
+def test_enable_fast_tokenizer_only_accepts_a_matching_tokenizer(phobert_path, monkeypatch, extra_ids, enabled):
+    tokenizer = IntentTokenizer(phobert_path)
+    fast_tokenizer = FakeFastTokenizer(tokenizer.slow_tokenizer, extra_ids)
+    monkeypatch.setattr(tokenization.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: fast_tokenizer)
+
+    assert tokenizer.enable_fast_tokenizer(["xem menu", "cho mình pizza hải_sản"]) is enabled
+    assert tokenizer.fast_tokenizer is (fast_tokenizer if enabled else None)
+
+
+def test_enable_fast_tokenizer_needs_verification_texts(phobert_path, monkeypatch):
+    tokenizer = IntentTokenizer(phobert_path)
+    fast_tokenizer = FakeFastTokenizer(tokenizer.slow_tokenizer, [])
+    monkeypatch.setattr(tokenization.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: fast_tokenizer)
+
+    assert tokenizer.enable_fast_tokenizer([]) is False
+    assert tokenizer.fast_tokenizer is None
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from models.utils.preprocessing import default_preprocessor
+from nlu.chatbot import Chatbot
+from nlu.worker_pool import ChatbotWorkerPool
+
+
+class ConfirmationChatbot(Chatbot):
+    # Keeps the real conversation state handling and replaces the models with a yes/no exchange.
+    def __init__(self):
+        self.preprocessor = default_preprocessor
+        self.model_intent = None
+        self.pending_information = {
+            "add_to_cart": [],
+            "provide_info": {},
+            "remove_from_cart": [],
+            "modify_cart_item": [],
+        }
+        self.pending_cus_info = False
+        self.pending_confirmation = None
+
+    def handle_message(self, message: str):
+        if self.pending_confirmation:
+            response = f"{message} to {self.pending_confirmation}"
+            self.pending_confirmation = None
+            return response
+        self.pending_confirmation = message
+        return f"confirm {message}?"
+
+
+def test_conversation_state_is_kept_per_session_inside_a_worker():
+    pool = ChatbotWorkerPool(ConfirmationChatbot(), num_workers=1)
+    try:
+        assert pool.handle_message("cancel_order", "channel-1") == "confirm cancel_order?"
+        assert pool.handle_message("confirm_order", "channel-2") == "confirm confirm_order?"
+        assert pool.handle_message("y", "channel-1") == "y to cancel_order"
+        assert pool.handle_message("n", "channel-2") == "n to confirm_order"
+        assert pool.handle_message("view_cart", "channel-1") == "confirm view_cart?"
+    finally:
+        pool.close()
+
+
+def test_least_recently_active_session_starts_over_when_a_worker_is_full():
+    pool = ChatbotWorkerPool(ConfirmationChatbot(), num_workers=1, max_sessions_per_worker=2)
+    try:
+        assert pool.handle_message("cancel_order", "channel-1") == "confirm cancel_order?"
+        assert pool.handle_message("confirm_order", "channel-2") == "confirm confirm_order?"
+        assert pool.handle_message("view_cart", "channel-3") == "confirm view_cart?"
+        assert pool.handle_message("y", "channel-1") == "confirm y?"
+        assert pool.handle_message("y", "channel-3") == "y to view_cart"
+    finally:
+        pool.close()
+
+
+class CrashingChatbot(ConfirmationChatbot):
+    def handle_message(self, message: str):
+        if message == "crash":
+            os._exit(3)
+        return super().handle_message(message)
+
+
+def test_worker_that_died_between_messages_is_restarted():
+    pool = ChatbotWorkerPool(CrashingChatbot(), num_workers=1)
+    try:
+        pool.processes[0].kill()
+        pool.processes[0].join()
+        assert pool.handle_message("cancel_order", "channel-1") == "confirm cancel_order?"
+        assert pool.handle_message("y", "channel-1") == "y to cancel_order"
+    finally:
+        pool.close()
+
+
+def test_worker_that_dies_during_a_message_is_restarted_with_a_clear_error():
+    pool = ChatbotWorkerPool(CrashingChatbot(), num_workers=1)
+    try:
+        assert pool.handle_message("cancel_order", "channel-1") == "confirm cancel_order?"
+        with pytest.raises(RuntimeError, match=r"worker 0 died \(exit code 3\)"):
+            pool.handle_message("crash", "channel-2")
+        assert pool.processes[0].is_alive()
+        assert pool.handle_message("y", "channel-1") == "confirm y?"
+    finally:
+        pool.close()